@@ -14,19 +14,29 @@ Version: 1.0.0
 """
 
 import argparse
+import bisect
 import html
 import json
 import os
 import re
 import sys
 import csv
+import functools
+import operator
 from collections import defaultdict
-from dataclasses import dataclass, field, asdict
-from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field, fields
+from datetime import date
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Any
+import lxml.html
 from bs4 import BeautifulSoup, NavigableString
 
+try:
+    import orjson
+except ImportError:  # fall back to the stdlib encoder
+    orjson = None
+
 # =============================================================================
 # CONFIGURATION
 # =============================================================================
@@ -76,11 +86,87 @@ CONFIG = {
     ],
 }
 
+# Stamped into every output's metadata; taken once so all files of a run agree
+_EXTRACTION_DATE = date.today().isoformat()
+
+# The SNP Index and Glossary are parsed with lxml directly (no soup); content
+# is passed as utf-8 bytes so pages with an XML encoding declaration are accepted
+_HTML_PARSER = lxml.html.HTMLParser(encoding='utf-8')
+_SNP_TABLE_XPATH = '//table[contains(concat(" ", normalize-space(@class), " "), " bord ") or @border]'
+_GLOSSARY_DEF_XPATH = '//span[contains(concat(" ", normalize-space(@class), " "), " def ")]'
+
+# Year and file-type patterns combined into one alternation each, so a single
+# scan of the filename reports every pattern that matched. Alternatives are
+# lookaheads so overlapping matches (e.g. "HapgrpTreeTrunk") are not consumed.
+# Earlier entries in CONFIG still take priority over later ones.
+_YEAR_RE = re.compile('(?=' + '|'.join(f'(?:{p})' for p in CONFIG['year_patterns']) + ')')
+_FILE_TYPE_RE = re.compile(
+    '(?=' + '|'.join(f"(?P<{file_type}>{'|'.join(patterns)})"
+             for file_type, patterns in CONFIG['file_patterns'].items()) + ')',
+    re.I,
+)
+
+# Encoding fixes in CONFIG order, plus the subset that can occur in ASCII text
+_ENCODING_FIXES = tuple(CONFIG['encoding_fixes'].items())
+_ASCII_ENCODING_FIXES = tuple((bad, good) for bad, good in _ENCODING_FIXES if bad.isascii())
+
+# Precompiled patterns (hot paths call these once per node / row / cell)
+
+_RE_BODY_OPEN = re.compile(r'<body\b', re.I)
+_RE_BODY_CLOSE = re.compile(r'</body\s*>', re.I)
+_RE_NOISE_BLOCKS = re.compile(r'<(script|style|noscript)\b[^>]*>.*?</\1\s*>', re.S | re.I)
+_RE_HAP_TREE_YEAR = re.compile(r'Haplogroup Tree (\d{4})')
+_RE_HAPGRP_LETTER = re.compile(r'hapgrp([a-t])|haplogroup.([a-t])\.html', re.I)
+_RE_FONT_BULLET = re.compile(r'<font\s+color\s*=\s*["\']?#DEDEDE["\']?\s*>', re.I)
+_RE_LIGHTDARK = re.compile(r'<span\s+class\s*=\s*["\']?(?:light|dark)["\']?\s*>', re.I)
+# Full and abbreviated English month names (as accepted by %B / %b)
+_MONTH_NAMES = ['january', 'february', 'march', 'april', 'may', 'june', 'july',
+                'august', 'september', 'october', 'november', 'december']
+_MONTHS = {name: i for i, name in enumerate(_MONTH_NAMES, 1)}
+_MONTHS.update({name[:3]: i for i, name in enumerate(_MONTH_NAMES, 1)})
+
+# Legend entries styled like haplogroups on tree pages
+_LEGEND_NAMES = frozenset({'added', 'renamed', 'redefined', 'not on', 'confirmed',
+                           'provisional', 'private', 'investigation'})
+_LEGEND_MAX_LEN = max(len(n) for n in _LEGEND_NAMES)
+
+# SNP list tokenizer: a <b>/<span>/<i> element, a text run, or any other tag
+_RE_SNP_TOKEN = re.compile(
+    r'<(?P<tag>b|span|i)(?P<attrs>[ \t\r\n\f][^>]*)?>(?P<inner>.*?)</(?P=tag)\s*>'
+    r'|(?P<text>[^<]+)|<', re.S | re.I)
+_RE_NESTED_TAG = {tag: re.compile(rf'<{tag}[\s>/]', re.I) for tag in ('b', 'span', 'i')}
+_RE_INNER_SPAN = re.compile(r'<span\b([^>]*)>(.*?)</span\s*>', re.S | re.I)
+_RE_CLASS_ATTR = re.compile(r'\bclass\s*=\s*"([^"]*)"', re.I)
+_RE_ANY_TAG = re.compile(r'<[^>]*>')
+# Depth markers in the order calculate_depth tries them:
+# 2006-2008 use the replacement character (corrupted bullet), 2009+ use bullets
+_DEPTH_MARKERS_OLD = ('\ufffd', '•')
+_DEPTH_MARKERS = ('•', '&#8226;', '\ufffd')
+# Raw-HTML scan for depth: hap span openings and the tags that start a new line
+_RE_HAP_SPAN_OPEN = re.compile(r'<span\s[^>]*?\bclass\s*=\s*["\']?(?:[^"\'>\s]+\s+)*hap', re.I)
+_RE_LINE_START = re.compile(
+    r'<(?:br|/?(?:p|div|td|th|tr|li|ul|ol|dl|dd|dt|table|body|h[1-6]|center|blockquote))\b[^>]*>', re.I)
+_RE_COMMENT = re.compile(r'<!--.*?-->', re.S)
+_RE_TAG = re.compile(r'<(/?)([a-zA-Z][\w:-]*)[^>]*?(/?)>')
+_VOID_TAGS = frozenset({'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+                        'link', 'meta', 'param', 'source', 'track', 'wbr'})
+_RE_SPLIT_COMMA = re.compile(r'[,]\s*')
+_RE_SPLIT_COMMA_SLASH = re.compile(r'[,/]\s*')
+_RE_SPLIT_SEMI = re.compile(r';\s*')
+_RE_ALIAS_SEP = re.compile(r'[;,/]')
+_RE_DASH_ONLY = re.compile(r'^\s*[-–—]\s*$')
+_RE_HAP_CLASS = re.compile(r'^hap')
+_RE_REV_DATE = re.compile(r'Last\s+revision\s+date[^:]*:\s*(\d+)\s+(\w+)\s+(\d{4})')
+_RE_SNP_HEADER = re.compile(r'SNP', re.I)
+_RE_CHRY = re.compile(r'chrY:(\d+)')
+_RE_RS = re.compile(r'rs\d+')
+_RE_RS_POS = re.compile(r'(rs\d+)\s*[;,]\s*(\d+)')
+
 # =============================================================================
 # DATA CLASSES
 # =============================================================================
 
-@dataclass
+@dataclass(slots=True)
 class SNP:
     """Represents a single SNP marker."""
     name: str
@@ -95,7 +181,7 @@ class SNP:
         return d
 
 
-@dataclass
+@dataclass(slots=True)
 class SNPRecord:
     """Full SNP record from SNP Index."""
     name: str
@@ -112,11 +198,19 @@ class SNPRecord:
     versions_present: List[str] = field(default_factory=list)
     
     def to_dict(self) -> dict:
-        d = asdict(self)
-        return {k: v for k, v in d.items() if v is not None and v != []}
+        # Omit None and empty lists; built directly rather than via asdict's deep copy
+        d = {}
+        for key in _SNP_RECORD_FIELDS:
+            value = getattr(self, key)
+            if value is not None and value != []:
+                d[key] = list(value) if isinstance(value, list) else value
+        return d
+
 
+_SNP_RECORD_FIELDS = tuple(f.name for f in fields(SNPRecord))
 
-@dataclass
+
+@dataclass(slots=True)
 class HaplogroupNode:
     """Represents a node in the haplogroup tree."""
     id: str
@@ -134,6 +228,12 @@ class HaplogroupNode:
     children: List[str] = field(default_factory=list)
     source_version: str = ''
     revision_date: Optional[str] = None
+    # Names in defining_snps, kept in step with it when pages are merged
+    defining_snp_names: Set[str] = field(default_factory=set, init=False, repr=False,
+                                         compare=False)
+    
+    def __post_init__(self):
+        self.defining_snp_names = {s.name for s in self.defining_snps}
     
     def to_dict(self) -> dict:
         return {
@@ -161,46 +261,178 @@ def clean_text(text: str) -> str:
     """Clean and normalize text content."""
     if not text:
         return ''
-    for bad, good in CONFIG['encoding_fixes'].items():
+    # Most text is plain ASCII, where only the ASCII fixes (&nbsp;) can apply
+    for bad, good in (_ASCII_ENCODING_FIXES if text.isascii() else _ENCODING_FIXES):
         text = text.replace(bad, good)
-    text = html.unescape(text)
-    text = re.sub(r'\s+', ' ', text)
-    return text.strip()
+    if '&' in text:
+        text = html.unescape(text)
+    # split() with no argument collapses the same whitespace set as \s+
+    return ' '.join(text.split())
+
+
+@functools.lru_cache(maxsize=8)
+def read_html(filepath: str) -> str:
+    """Read and decode an ISOGG HTML file.
+    
+    Cached so that year detection from content and the subsequent parse of
+    the same file share one read and decode.
+    """
+    with open(filepath, 'r', encoding='utf-8', errors='replace') as f:
+        return f.read()
+
+
+def slice_body(content: str) -> str:
+    """Return the <body>...</body> portion of an HTML document.
+    
+    Tree pages are parsed without a SoupStrainer because depth calculation
+    walks previous siblings, so skipping the <head> is done by slicing instead.
+    Falls back to the full document if no <body> tag is present.
+    """
+    start = _RE_BODY_OPEN.search(content)
+    if not start:
+        return content
+    end = None
+    for end in _RE_BODY_CLOSE.finditer(content, start.start()):
+        pass
+    return content[start.start():end.end() if end else len(content)]
+
+
+def element_text(element) -> str:
+    """lxml equivalent of bs4's get_text(strip=True): stripped text pieces joined."""
+    return ''.join(text.strip() for text in element.itertext())
+
+
+def strip_noise(content: str) -> str:
+    """Remove <script>, <style> and <noscript> blocks before parsing.
+    
+    None of these contain haplogroup or SNP data, so dropping them saves
+    building their subtrees in the soup.
+    """
+    return _RE_NOISE_BLOCKS.sub('', content)
+
+
+@functools.lru_cache(maxsize=32)
+def _description_pattern(letter: str) -> re.Pattern:
+    """Compiled "Haplogroup X..." paragraph pattern for a haplogroup letter."""
+    return re.compile(rf'\s*(?:Y-DNA\s+)?[Hh]aplogroup\s+({re.escape(letter)}\S*)')
+
+
+def write_json(path, obj: Any) -> None:
+    """Write obj as 2-space indented UTF-8 JSON.
+    
+    Uses orjson when installed; the output matches
+    json.dump(obj, f, indent=2, ensure_ascii=False).
+    """
+    if orjson is not None:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(obj, f, indent=2, ensure_ascii=False)
+
+
+def read_json(path) -> Any:
+    """Load a JSON file, with orjson when installed (reads bytes, no text decode)."""
+    if orjson is not None:
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _json_bytes(obj: Any, pretty: bool = True) -> bytes:
+    """Encode obj as UTF-8 JSON bytes, 2-space indented or compact."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else None)
+    if pretty:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def write_json_stream(path, metadata: Dict[str, Any], key: str, entries: Iterable,
+                      mapping: bool = True, pretty: bool = True) -> None:
+    """Write {"metadata": metadata, key: ...} with the body encoded entry by entry.
+    
+    entries yields (name, value) pairs when mapping is True, or list items
+    otherwise. Only one entry is encoded at a time, so the full body never
+    has to exist as a single dict or list. With pretty the output is
+    identical to write_json on the assembled object; without it the JSON is
+    compact (no indentation or spaces after separators).
+    """
+    # Entries sit two levels deep; JSON strings cannot contain raw newlines,
+    # so re-indenting the encoded bytes is safe (and a no-op when compact)
+    if pretty:
+        outer, inner, colon = b'\n  ', b'\n    ', b': '
+    else:
+        outer, inner, colon = b'', b'', b':'
+    with open(path, 'wb') as f:
+        f.write(b'{' + outer + b'"metadata"' + colon
+                + _json_bytes(metadata, pretty).replace(b'\n', outer))
+        f.write(b',' + outer + _json_bytes(key) + colon + (b'{' if mapping else b'['))
+        sep = inner
+        for entry in entries:
+            if mapping:
+                name, value = entry
+                f.write(sep + _json_bytes(name) + colon
+                        + _json_bytes(value, pretty).replace(b'\n', inner))
+            else:
+                f.write(sep + _json_bytes(entry, pretty).replace(b'\n', inner))
+            sep = b',' + inner
+        if sep != inner:
+            f.write(outer)
+        f.write((b'}' if mapping else b']') + (b'\n}' if pretty else b'}'))
 
 
 def detect_year(filepath: str, content: str = None) -> Optional[str]:
     """Detect the ISOGG year from filename or content."""
-    filename = os.path.basename(filepath)
-    
-    for pattern in CONFIG['year_patterns']:
-        match = re.search(pattern, filename)
-        if match:
-            year = match.group(1)
-            if len(year) == 2:
-                year = '20' + year if int(year) < 50 else '19' + year
-            return year
+    year = _detect_year_from_name(os.path.basename(filepath))
+    if year:
+        return year
     
     if content:
-        match = re.search(r'Haplogroup Tree (\d{4})', content)
+        match = _RE_HAP_TREE_YEAR.search(content)
         if match:
             return match.group(1)
     return None
 
 
+@functools.lru_cache(maxsize=1024)
+def _detect_year_from_name(filename: str) -> Optional[str]:
+    """Filename part of detect_year (pure, so memoized)."""
+    # Each year pattern has one capture group, so lastindex is its priority
+    best = None
+    for match in _YEAR_RE.finditer(filename):
+        if best is None or match.lastindex < best.lastindex:
+            best = match
+    if best:
+        year = best.group(best.lastindex)
+        if len(year) == 2:
+            year = '20' + year if int(year) < 50 else '19' + year
+        return year
+    return None
+
+
 def identify_file_type(filepath: str) -> Optional[str]:
     """Identify the type of ISOGG file from its name."""
-    filename = os.path.basename(filepath)
-    
-    for file_type, patterns in CONFIG['file_patterns'].items():
-        for pattern in patterns:
-            if re.search(pattern, filename, re.I):
-                if file_type == 'haplogroup':
-                    # Match both HapgrpA and Haplogroup A formats
-                    match = re.search(r'hapgrp([a-t])|haplogroup.([a-t])\.html', filename, re.I)
-                    if match:
-                        letter = (match.group(1) or match.group(2)).upper()
-                        return f'haplogroup_{letter}'
-                return file_type
+    return _file_type_from_name(os.path.basename(filepath))
+
+
+@functools.lru_cache(maxsize=1024)
+def _file_type_from_name(filename: str) -> Optional[str]:
+    """Filename lookup behind identify_file_type (pure, so memoized)."""
+    matched = {m.lastgroup for m in _FILE_TYPE_RE.finditer(filename)}
+    if not matched:
+        return None
+    
+    for file_type in CONFIG['file_patterns']:
+        if file_type in matched:
+            if file_type == 'haplogroup':
+                # Match both HapgrpA and Haplogroup A formats
+                match = _RE_HAPGRP_LETTER.search(filename)
+                if match:
+                    letter = (match.group(1) or match.group(2)).upper()
+                    return f'haplogroup_{letter}'
+            return file_type
     return None
 
 
@@ -213,38 +445,86 @@ def get_line_content_before_span(span) -> str:
     Special handling: In some years (e.g., 2017), the <br> tag may be INSIDE a 
     <span class="light"> tag rather than as a sibling. We need to detect this
     and extract only the content after the last <br> within such spans.
+    
+    This DOM walk is the fallback for line_contents_before_hap_spans.
     """
-    line_content = []
+    line_content = []  # collected right-to-left, reversed at the end
     sibling = span.previous_sibling
     
     while sibling:
         if hasattr(sibling, 'name') and sibling.name == 'br':
             break
         if isinstance(sibling, NavigableString):
-            line_content.insert(0, str(sibling))
+            line_content.append(str(sibling))
         elif hasattr(sibling, 'name'):
             # Check if this element CONTAINS a br tag (edge case in some years)
-            if hasattr(sibling, 'find') and sibling.find('br'):
-                # Get content after the last <br> within this element
-                inner_html = str(sibling)
-                # Find last <br> position
-                br_pos = inner_html.rfind('<br')
-                if br_pos >= 0:
-                    # Find end of br tag
-                    end_pos = inner_html.find('>', br_pos)
-                    if end_pos >= 0:
-                        after_br = inner_html[end_pos+1:]
-                        line_content.insert(0, after_br)
-                        break
-                else:
-                    line_content.insert(0, inner_html)
-            else:
-                line_content.insert(0, str(sibling))
+            brs = sibling.find_all('br') if hasattr(sibling, 'find_all') else None
+            if brs:
+                # Keep only what follows the last <br>, walking up to this sibling
+                # instead of re-serializing the whole element
+                node = brs[-1]
+                while node is not sibling:
+                    line_content.extend(str(following) for following in reversed(list(node.next_siblings)))
+                    node = node.parent
+                break
+            line_content.append(str(sibling))
         sibling = sibling.previous_sibling
     
+    line_content.reverse()
     return ''.join(line_content)
 
 
+def _mask_comment(match: re.Match) -> str:
+    """Blank out a comment's body, keeping its length, so its markup is not scanned."""
+    return '<!--' + ' ' * (len(match.group()) - 7) + '-->'
+
+
+def _enclosing_start(content: str, line_start: int, span_start: int) -> int:
+    """Where the sibling walk for a span starting at span_start would stop.
+    
+    That is line_start, unless the span sits in an inline element (e.g. a
+    <font> wrapper) opened after line_start: the walk never leaves the
+    span's parent, so the line then begins right after that opening tag.
+    """
+    open_tags = []  # (tag name, end of opening tag)
+    for match in _RE_TAG.finditer(content, line_start, span_start):
+        closing, name, self_closing = match.groups()
+        name = name.lower()
+        if closing:
+            # Close the matching element and anything left open inside it
+            for i in range(len(open_tags) - 1, -1, -1):
+                if open_tags[i][0] == name:
+                    del open_tags[i:]
+                    break
+        elif not self_closing and name not in _VOID_TAGS:
+            open_tags.append((name, match.end()))
+    return open_tags[-1][1] if open_tags else line_start
+
+
+def line_contents_before_hap_spans(content: str) -> List[str]:
+    """Get the line content before every haplogroup span, in document order.
+    
+    Raw-HTML version of get_line_content_before_span: for each
+    <span class="hap..."> opening tag, the line starts after the nearest
+    preceding <br> (including one nested in a <span class="light">) or
+    block-level tag, or after the opening tag of the span's enclosing inline
+    element if that is later. Comments are masked, so markup inside them is
+    neither counted as a span nor as a line break. Entities are unescaped
+    for calculate_depth. Malformed markup that lxml repairs differently can
+    still diverge, which is why callers fall back to the DOM walk when the
+    span counts disagree.
+    """
+    scan = _RE_COMMENT.sub(_mask_comment, content)
+    line_starts = [m.end() for m in _RE_LINE_START.finditer(scan)]
+    lines = []
+    for match in _RE_HAP_SPAN_OPEN.finditer(scan):
+        span_start = match.start()
+        i = bisect.bisect_right(line_starts, span_start)
+        line_start = _enclosing_start(scan, line_starts[i - 1] if i else 0, span_start)
+        lines.append(html.unescape(content[line_start:span_start]))
+    return lines
+
+
 def calculate_depth(line_content: str, year: str) -> int:
     """Calculate tree depth based on year format.
     
@@ -256,38 +536,22 @@ def calculate_depth(line_content: str, year: str) -> int:
     The depth is the number of bullet markers before the haplogroup name.
     The line_content should be the HTML content BEFORE the haplogroup span on the same line.
     """
-    year_int = int(year)
-    
-    # Try different counting methods based on year
-    if year_int <= 2008:
-        # Old format: count corrupted bullet characters
-        # The replacement character appears as \ufffd (�)
-        count = line_content.count('\ufffd')
-        if count > 0:
+    if not line_content:
+        return 0
+    
+    # Bullet glyphs are disjoint per format, so stop at the first one present
+    old_format = int(year) <= 2008
+    for marker in (_DEPTH_MARKERS_OLD if old_format else _DEPTH_MARKERS):
+        count = line_content.count(marker)
+        if count:
             return count
-        count = line_content.count('•')
-        if count > 0:
-            return count
-        # Fallback: count font color tags
-        count = len(re.findall(r'<font\s+color\s*=\s*["\']?#DEDEDE["\']?\s*>', line_content, re.I))
-        return count
-    else:
-        # 2009+: Count bullet entities and characters
-        # First count actual bullet characters (•)
-        count = line_content.count('•')
-        if count > 0:
-            return count
-        # HTML entity
-        count = line_content.count('&#8226;')
-        if count > 0:
-            return count
-        # Replacement character
-        count = line_content.count('\ufffd')
-        if count > 0:
-            return count
-        # Fallback: count light/dark spans
-        spans = re.findall(r'<span class="(?:light|dark)">', line_content)
-        return len(spans)
+    
+    # Fallback: count indentation tags (only possible if markup is present)
+    if '<' not in line_content:
+        return 0
+    if old_format:
+        return len(_RE_FONT_BULLET.findall(line_content))
+    return len(_RE_LIGHTDARK.findall(line_content))
 
 
 def extract_snp_status(element) -> str:
@@ -329,46 +593,11 @@ def parse_snp_list(snp_text: str) -> List[SNP]:
         return snps
     
     if '<' in snp_text:
-        temp_soup = BeautifulSoup(f'<div>{snp_text}</div>', 'html.parser')
-        
-        for element in temp_soup.div.children:
-            if isinstance(element, NavigableString):
-                text = str(element).strip()
-                for snp_name in re.split(r'[,]\s*', text):
-                    snp_name = snp_name.strip()
-                    if snp_name and snp_name != '-' and not snp_name.startswith('('):
-                        if '/' in snp_name:
-                            parts = snp_name.split('/')
-                            snps.append(SNP(name=parts[0].strip(), 
-                                          aliases=[p.strip() for p in parts[1:]]))
-                        else:
-                            snps.append(SNP(name=snp_name))
-            elif element.name == 'b':
-                text = element.get_text().strip()
-                inner_span = element.find('span')
-                status = extract_snp_status(inner_span) if inner_span else 'normal'
-                if inner_span:
-                    text = inner_span.get_text().strip()
-                for snp_name in re.split(r'[,/]\s*', text):
-                    snp_name = snp_name.strip()
-                    if snp_name and snp_name != '-':
-                        snps.append(SNP(name=snp_name, status=status, is_representative=True))
-            elif element.name == 'span':
-                status = extract_snp_status(element)
-                text = element.get_text().strip()
-                is_rep = element.find('b') is not None
-                for snp_name in re.split(r'[,/]\s*', text):
-                    snp_name = snp_name.strip()
-                    if snp_name and snp_name != '-':
-                        snps.append(SNP(name=snp_name, status=status, is_representative=is_rep))
-            elif element.name == 'i':
-                text = element.get_text().strip()
-                for snp_name in re.split(r'[,/]\s*', text):
-                    snp_name = snp_name.strip()
-                    if snp_name and snp_name != '-':
-                        snps.append(SNP(name=snp_name, status='normal'))
+        snps = _parse_snp_markup(snp_text)
+        if snps is None:
+            snps = _parse_snp_markup_soup(snp_text)
     else:
-        for snp_name in re.split(r'[,]\s*', snp_text):
+        for snp_name in _RE_SPLIT_COMMA.split(snp_text):
             snp_name = snp_name.strip()
             if snp_name and snp_name != '-':
                 if '/' in snp_name:
@@ -379,6 +608,125 @@ def parse_snp_list(snp_text: str) -> List[SNP]:
                     snps.append(SNP(name=snp_name))
     return snps
 
+
+def _snp_status_from_attrs(attrs: str) -> str:
+    """Extract SNP status from the raw attribute string of a tag."""
+    match = _RE_CLASS_ATTR.search(attrs)
+    if match:
+        for cls in match.group(1).split():
+            if cls in CONFIG['snp_status_classes']:
+                return CONFIG['snp_status_classes'][cls]
+    return 'normal'
+
+
+def _markup_text(fragment: str) -> str:
+    """Equivalent of get_text() on an HTML fragment."""
+    if '<' in fragment:
+        fragment = _RE_ANY_TAG.sub('', fragment)
+    if '&' in fragment:
+        fragment = html.unescape(fragment)
+    return fragment
+
+
+def _parse_snp_markup(snp_text: str) -> Optional[List[SNP]]:
+    """Tokenize an SNP list containing <b>/<span>/<i> markup without bs4.
+    
+    snp_text is re-serialized by bs4, so tags are lower-case with quoted
+    attributes. Returns None for markup the tokenizer does not handle (other
+    top-level tags, stray '<', or nested tags of the same name) so the
+    caller can fall back to _parse_snp_markup_soup.
+    """
+    snps = []
+    for token in _RE_SNP_TOKEN.finditer(snp_text):
+        tag, attrs, inner, text = token.group('tag', 'attrs', 'inner', 'text')
+        if text is not None:
+            text = _markup_text(text).strip()
+            for snp_name in _RE_SPLIT_COMMA.split(text):
+                snp_name = snp_name.strip()
+                if snp_name and snp_name != '-' and not snp_name.startswith('('):
+                    if '/' in snp_name:
+                        parts = snp_name.split('/')
+                        snps.append(SNP(name=parts[0].strip(), 
+                                      aliases=[p.strip() for p in parts[1:]]))
+                    else:
+                        snps.append(SNP(name=snp_name))
+            continue
+        if tag is None:
+            return None
+        tag = tag.lower()
+        if _RE_NESTED_TAG[tag].search(inner):
+            return None
+        
+        if tag == 'b':
+            if len(_RE_NESTED_TAG['span'].findall(inner)) > 1:
+                return None
+            inner_span = _RE_INNER_SPAN.search(inner)
+            if inner_span:
+                status = _snp_status_from_attrs(inner_span.group(1))
+                text = _markup_text(inner_span.group(2)).strip()
+            else:
+                status = 'normal'
+                text = _markup_text(inner).strip()
+            is_rep = True
+        elif tag == 'span':
+            status = _snp_status_from_attrs(attrs or '')
+            text = _markup_text(inner).strip()
+            is_rep = _RE_NESTED_TAG['b'].search(inner) is not None
+        else:
+            status = 'normal'
+            text = _markup_text(inner).strip()
+            is_rep = False
+        for snp_name in _RE_SPLIT_COMMA_SLASH.split(text):
+            snp_name = snp_name.strip()
+            if snp_name and snp_name != '-':
+                snps.append(SNP(name=snp_name, status=status, is_representative=is_rep))
+    return snps
+
+
+def _parse_snp_markup_soup(snp_text: str) -> List[SNP]:
+    """Parse an SNP list containing markup by building a small soup."""
+    snps = []
+    # html.parser is cheaper than lxml's full-document wrapping for short snippets
+    temp_soup = BeautifulSoup(f'<div>{snp_text}</div>', 'html.parser')
+    
+    for element in temp_soup.div.children:
+        if isinstance(element, NavigableString):
+            text = str(element).strip()
+            for snp_name in _RE_SPLIT_COMMA.split(text):
+                snp_name = snp_name.strip()
+                if snp_name and snp_name != '-' and not snp_name.startswith('('):
+                    if '/' in snp_name:
+                        parts = snp_name.split('/')
+                        snps.append(SNP(name=parts[0].strip(), 
+                                      aliases=[p.strip() for p in parts[1:]]))
+                    else:
+                        snps.append(SNP(name=snp_name))
+        elif element.name == 'b':
+            text = element.get_text().strip()
+            inner_span = element.find('span')
+            status = extract_snp_status(inner_span) if inner_span else 'normal'
+            if inner_span:
+                text = inner_span.get_text().strip()
+            for snp_name in _RE_SPLIT_COMMA_SLASH.split(text):
+                snp_name = snp_name.strip()
+                if snp_name and snp_name != '-':
+                    snps.append(SNP(name=snp_name, status=status, is_representative=True))
+        elif element.name == 'span':
+            status = extract_snp_status(element)
+            text = element.get_text().strip()
+            is_rep = element.find('b') is not None
+            for snp_name in _RE_SPLIT_COMMA_SLASH.split(text):
+                snp_name = snp_name.strip()
+                if snp_name and snp_name != '-':
+                    snps.append(SNP(name=snp_name, status=status, is_representative=is_rep))
+        elif element.name == 'i':
+            text = element.get_text().strip()
+            for snp_name in _RE_SPLIT_COMMA_SLASH.split(text):
+                snp_name = snp_name.strip()
+                if snp_name and snp_name != '-':
+                    snps.append(SNP(name=snp_name, status='normal'))
+    return snps
+
 # =============================================================================
 # TREE PARSING
 # =============================================================================
@@ -387,7 +735,7 @@ class TreeParser:
     """Parser for ISOGG haplogroup tree HTML files."""
     
     def __init__(self, year: str, verbose: bool = False):
-        self.year = year
+        self.year = sys.intern(year)
         self.verbose = verbose
         self.nodes: Dict[str, HaplogroupNode] = {}
         self.order_counter: int = 0  # Counter for document order
@@ -399,19 +747,17 @@ class TreeParser:
         
         self.order_counter = 0  # Reset order counter
         
-        with open(filepath, 'r', encoding='utf-8', errors='replace') as f:
-            content = f.read()
+        content = read_html(filepath)
         
-        soup = BeautifulSoup(content, 'html.parser')
+        body_html = strip_noise(slice_body(content))
+        soup = BeautifulSoup(body_html, 'lxml')
         revision_date = self._extract_revision_date(soup)
         body = soup.find('body')
         if not body:
             raise ValueError("No body element found")
         
-        hap_spans = body.find_all('span', class_=re.compile(r'^hap'))
-        
-        for span in hap_spans:
-            node = self._parse_haplogroup_line(span, revision_date)
+        for span, line_content in self._hap_spans_with_lines(body, body_html):
+            node = self._parse_haplogroup_line(span, revision_date, line_content)
             if node:
                 node.order_index = self.order_counter
                 self.order_counter += 1
@@ -427,17 +773,16 @@ class TreeParser:
         
         self.order_counter = 0  # Reset order counter for each page
         
-        with open(filepath, 'r', encoding='utf-8', errors='replace') as f:
-            content = f.read()
+        content = read_html(filepath)
         
-        soup = BeautifulSoup(content, 'html.parser')
+        body_html = strip_noise(slice_body(content))
+        soup = BeautifulSoup(body_html, 'lxml')
         revision_date = self._extract_revision_date(soup)
         body = soup.find('body')
-        hap_spans = body.find_all('span', class_=re.compile(r'^hap'))
         
         page_nodes = {}
-        for span in hap_spans:
-            node = self._parse_haplogroup_line(span, revision_date)
+        for span, line_content in self._hap_spans_with_lines(body, body_html):
+            node = self._parse_haplogroup_line(span, revision_date, line_content)
             if node:
                 node.order_index = self.order_counter
                 self.order_counter += 1
@@ -446,13 +791,34 @@ class TreeParser:
         self._extract_descriptions(soup, page_nodes, letter)
         return page_nodes
     
-    def _parse_haplogroup_line(self, span, revision_date: str) -> Optional[HaplogroupNode]:
+    def _hap_spans_with_lines(self, body, body_html: str) -> List[Tuple[Any, Optional[str]]]:
+        """Pair each hap span with its raw line content for depth calculation.
+        
+        If the raw scan does not find the same number of spans as the soup
+        (e.g. malformed markup that lxml repairs), line content is left as
+        None so that _parse_haplogroup_line falls back to walking the DOM.
+        Both paths give the same depths, so this only affects speed.
+        """
+        hap_spans = body.find_all('span', class_=_RE_HAP_CLASS)
+        line_contents = line_contents_before_hap_spans(body_html)
+        if len(line_contents) != len(hap_spans):
+            if self.verbose:
+                print(f"  Raw span scan found {len(line_contents)} spans, soup found "
+                      f"{len(hap_spans)}; using DOM walk for depth")
+            line_contents = [None] * len(hap_spans)
+        return list(zip(hap_spans, line_contents))
+    
+    def _parse_haplogroup_line(self, span, revision_date: str,
+                               line_content: Optional[str] = None) -> Optional[HaplogroupNode]:
         """Parse a single haplogroup line.
         
         The haplogroup name can be:
         1. Inside a <b> tag within the span
         2. Inside an <a> tag within the span (for linked haplogroups)
         3. Directly as text content of the span (for root nodes like Y)
+        
+        line_content is the raw HTML before the span on the same line; if not
+        given it is recovered by walking the span's previous siblings.
         """
         # Try to find name in <b> tag first
         bold = span.find('b')
@@ -471,15 +837,15 @@ class TreeParser:
             return None
         
         # Skip known non-haplogroup entries (legend items)
-        if name.lower() in ['added', 'renamed', 'redefined', 'not on', 'confirmed', 
-                            'provisional', 'private', 'investigation']:
+        if len(name) <= _LEGEND_MAX_LEN and name.lower() in _LEGEND_NAMES:
             return None
         
         status = extract_clade_status(span)
         is_paragroup = name.endswith('*')
         
         # Get line content BEFORE the span for depth calculation
-        line_content = get_line_content_before_span(span)
+        if line_content is None:
+            line_content = get_line_content_before_span(span)
         depth = calculate_depth(line_content, self.year)
         
         snp_text = ''
@@ -498,7 +864,7 @@ class TreeParser:
                     break
         
         snp_text = snp_text.replace('&nbsp;', ' ').strip()
-        snp_text = re.sub(r'^\s*[-–—]\s*$', '', snp_text)
+        snp_text = _RE_DASH_ONLY.sub('', snp_text)
         defining_snps = parse_snp_list(snp_text)
         
         link = span.find('a')
@@ -514,22 +880,23 @@ class TreeParser:
     def _extract_revision_date(self, soup) -> Optional[str]:
         """Extract the revision date."""
         text = soup.get_text()
-        match = re.search(r'Last\s+revision\s+date[^:]*:\s*(\d+\s+\w+\s+\d{4})', text)
+        match = _RE_REV_DATE.search(text)
         if match:
-            date_str = match.group(1)
-            for fmt in ['%d %B %Y', '%d %b %Y', '%B %d, %Y']:
+            day, month_name, year = match.groups()
+            month = _MONTHS.get(month_name.lower())
+            if month and len(day) <= 2:
                 try:
-                    dt = datetime.strptime(date_str, fmt)
-                    return dt.strftime('%Y-%m-%d')
-                except ValueError:
-                    continue
+                    return date(int(year), month, int(day)).isoformat()
+                except ValueError:  # e.g. 31 February
+                    pass
         return None
     
     def _extract_descriptions(self, soup, nodes: Dict[str, HaplogroupNode], letter: str):
         """Extract population descriptions."""
+        desc_re = _description_pattern(letter)
         for p in soup.find_all('p'):
             text = p.get_text()
-            match = re.match(rf'\s*(?:Y-DNA\s+)?[Hh]aplogroup\s+({letter}\S*)', text)
+            match = desc_re.match(text)
             if match:
                 hap_id = match.group(1)
                 if hap_id in nodes:
@@ -543,37 +910,37 @@ class TreeParser:
         The order_index field is used to maintain document order.
         """
         # Sort by order_index to preserve document order (critical for tree building)
-        nodes_in_order = sorted(self.nodes.values(), key=lambda n: n.order_index)
+        nodes_by_id = self.nodes
+        nodes_in_order = sorted(nodes_by_id.values(), key=lambda n: n.order_index)
         
         # depth_stack[i] = node_id at depth i
         depth_stack: List[str] = []
+        # parent_id -> set of children already added (O(1) dedup)
+        added_children: Dict[str, set] = {}
         
         for node in nodes_in_order:
             depth = node.depth
             
-            # Pop stack until we're at the right level
-            # If current depth is N, parent is at depth N-1
-            while len(depth_stack) > depth:
-                depth_stack.pop()
+            # Truncate stack in place; if current depth is N, parent is at depth N-1
+            del depth_stack[depth:]
             
             # Set parent if stack is not empty
             if depth_stack:
                 parent_id = depth_stack[-1]
                 node.parent_id = parent_id
-                if parent_id in self.nodes:
-                    if node.id not in self.nodes[parent_id].children:
-                        self.nodes[parent_id].children.append(node.id)
+                parent = nodes_by_id.get(parent_id)
+                if parent is not None:
+                    seen = added_children.get(parent_id)
+                    if seen is None:
+                        seen = added_children[parent_id] = set(parent.children)
+                    if node.id not in seen:
+                        seen.add(node.id)
+                        parent.children.append(node.id)
             
-            # Push current node onto stack at its depth
-            if len(depth_stack) < depth + 1:
-                # Extend stack if needed
-                while len(depth_stack) < depth:
-                    depth_stack.append(depth_stack[-1] if depth_stack else '')
-                depth_stack.append(node.id)
-            else:
-                depth_stack[depth] = node.id
-                # Truncate stack to current depth + 1
-                depth_stack = depth_stack[:depth + 1]
+            # Pad skipped levels (depth jumps by more than one), then push
+            while len(depth_stack) < depth:
+                depth_stack.append(depth_stack[-1] if depth_stack else '')
+            depth_stack.append(node.id)
 
 # =============================================================================
 # SNP INDEX PARSING
@@ -583,7 +950,7 @@ class SNPIndexParser:
     """Parser for ISOGG SNP Index HTML files."""
     
     def __init__(self, year: str, verbose: bool = False):
-        self.year = year
+        self.year = sys.intern(year)
         self.verbose = verbose
     
     def parse(self, filepath: str) -> List[SNPRecord]:
@@ -591,33 +958,33 @@ class SNPIndexParser:
         if self.verbose:
             print(f"Parsing SNP Index: {filepath}")
         
-        with open(filepath, 'r', encoding='utf-8', errors='replace') as f:
-            content = f.read()
+        content = read_html(filepath)
         
-        soup = BeautifulSoup(content, 'html.parser')
+        root = lxml.html.fromstring(strip_noise(content).encode('utf-8'), parser=_HTML_PARSER)
         
-        table = soup.find('table', class_='bord')
-        if not table:
-            table = soup.find('table', {'border': True})
-        if not table:
-            for t in soup.find_all('table'):
-                if t.find('td', string=re.compile(r'SNP', re.I)):
-                    table = t
-                    break
+        # One traversal for both markers; class="bord" takes priority over border=
+        tables = root.xpath(_SNP_TABLE_XPATH)
+        table = next((t for t in tables if 'bord' in (t.get('class') or '').split()), None)
+        if table is None and tables:
+            table = tables[0]
+        if table is None:
+            table = next((t for t in root.iter('table')
+                          if any(_RE_SNP_HEADER.search(element_text(td)) for td in t.iter('td'))), None)
         
-        if not table:
+        if table is None:
             raise ValueError("Could not find SNP Index table")
         
-        header_row = table.find('tr')
-        headers = [td.get_text(strip=True) for td in header_row.find_all(['td', 'th'])]
+        rows = list(table.iter('tr'))
+        header_row = rows[0]
+        headers = [element_text(td) for td in header_row.iter('td', 'th')]
         num_columns = len(headers)
         
         if self.verbose:
             print(f"  Found {num_columns} columns: {headers}")
         
         snps = []
-        for row in table.find_all('tr')[1:]:
-            cells = row.find_all('td')
+        for row in rows[1:]:
+            cells = list(row.iter('td'))
             if len(cells) < 4 and num_columns >= 4:
                 continue
             if len(cells) < 2:
@@ -633,21 +1000,24 @@ class SNPIndexParser:
         return snps
     
     def _parse_row(self, cells: list, num_columns: int) -> Optional[SNPRecord]:
-        """Parse a single table row."""
-        name = cells[0].get_text(strip=True)
+        """Parse a single table row of lxml <td> elements."""
+        # Extract every cell's text in one pass; only link cells are revisited
+        texts = [element_text(cell) for cell in cells]
+        name = texts[0]
         if not name or name == '&nbsp;':
             return None
         
         haplogroup = ''
         hap_cell = cells[1]
-        link = hap_cell.find('a')
-        if link:
-            haplogroup = link.get_text(strip=True)
+        link = hap_cell.find('.//a')
+        if link is not None:
+            haplogroup = element_text(link)
         else:
-            haplogroup = hap_cell.get_text(strip=True)
+            haplogroup = texts[1]
         
+        # Thousands of rows share each haplogroup label; keep one copy
         record = SNPRecord(
-            name=name, haplogroup=haplogroup,
+            name=name, haplogroup=sys.intern(haplogroup),
             source_version=self.year, versions_present=[self.year],
         )
         
@@ -655,106 +1025,105 @@ class SNPIndexParser:
         
         if num_columns >= 7:
             # 2011-2013 format: Name, Haplogroup, Aliases, RefSNP, Y-pos(NCBI36), Y-pos(GRCh37), Mutation
-            aliases_text = cells[2].get_text(strip=True)
+            aliases_text = texts[2]
             if aliases_text and aliases_text != '&nbsp;':
-                record.aliases = [a.strip() for a in re.split(r'[;,/]', aliases_text) if a.strip()]
+                record.aliases = [a.strip() for a in _RE_ALIAS_SEP.split(aliases_text) if a.strip()]
             
             rs_cell = cells[3]
-            rs_link = rs_cell.find('a')
-            rs_text = rs_link.get_text(strip=True) if rs_link else rs_cell.get_text(strip=True)
-            if rs_text and re.match(r'rs\d+', rs_text):
+            rs_link = rs_cell.find('.//a')
+            rs_text = element_text(rs_link) if rs_link is not None else texts[3]
+            if rs_text and _RE_RS.match(rs_text):
                 record.rs_id = rs_text
             
             # Build 36 position (column 4)
             pos36_cell = cells[4]
-            pos36_link = pos36_cell.find('a')
-            if pos36_link:
+            pos36_link = pos36_cell.find('.//a')
+            if pos36_link is not None:
                 href = pos36_link.get('href', '')
-                pos_match = re.search(r'chrY:(\d+)', href)
+                pos_match = _RE_CHRY.search(href)
                 if pos_match:
                     record.position_ncbi36 = int(pos_match.group(1))
                 else:
-                    pos_text = pos36_link.get_text(strip=True)
+                    pos_text = element_text(pos36_link)
                     if pos_text.isdigit():
                         record.position_ncbi36 = int(pos_text)
             else:
-                pos_text = pos36_cell.get_text(strip=True)
+                pos_text = texts[4]
                 if pos_text.isdigit():
                     record.position_ncbi36 = int(pos_text)
             
             # Build 37 position (column 5)
             pos37_cell = cells[5]
-            pos37_link = pos37_cell.find('a')
-            if pos37_link:
+            pos37_link = pos37_cell.find('.//a')
+            if pos37_link is not None:
                 href = pos37_link.get('href', '')
-                pos_match = re.search(r'chrY:(\d+)', href)
+                pos_match = _RE_CHRY.search(href)
                 if pos_match:
                     record.position_grch37 = int(pos_match.group(1))
                 else:
-                    pos_text = pos37_link.get_text(strip=True)
+                    pos_text = element_text(pos37_link)
                     if pos_text.isdigit():
                         record.position_grch37 = int(pos_text)
             else:
-                pos_text = pos37_cell.get_text(strip=True)
+                pos_text = texts[5]
                 if pos_text.isdigit():
                     record.position_grch37 = int(pos_text)
             
             # Mutation (column 6)
             if len(cells) > 6:
-                mut_text = cells[6].get_text(strip=True)
+                mut_text = texts[6]
                 if mut_text and '->' in mut_text:
                     record.mutation = mut_text
         
         elif num_columns >= 6:
             # 2014+ format: Name, Haplogroup, Aliases, RefSNP, Y-pos(GRCh37), Mutation
-            aliases_text = cells[2].get_text(strip=True)
+            aliases_text = texts[2]
             if aliases_text and aliases_text != '&nbsp;':
-                record.aliases = [a.strip() for a in re.split(r'[;,/]', aliases_text) if a.strip()]
+                record.aliases = [a.strip() for a in _RE_ALIAS_SEP.split(aliases_text) if a.strip()]
             
             rs_cell = cells[3]
-            rs_link = rs_cell.find('a')
-            rs_text = rs_link.get_text(strip=True) if rs_link else rs_cell.get_text(strip=True)
-            if rs_text and re.match(r'rs\d+', rs_text):
+            rs_link = rs_cell.find('.//a')
+            rs_text = element_text(rs_link) if rs_link is not None else texts[3]
+            if rs_text and _RE_RS.match(rs_text):
                 record.rs_id = rs_text
             
             pos_cell = cells[4]
-            pos_link = pos_cell.find('a')
-            if pos_link:
+            pos_link = pos_cell.find('.//a')
+            if pos_link is not None:
                 href = pos_link.get('href', '')
-                pos_match = re.search(r'chrY:(\d+)', href)
+                pos_match = _RE_CHRY.search(href)
                 if pos_match:
                     record.position_grch37 = int(pos_match.group(1))
                 else:
-                    pos_text = pos_link.get_text(strip=True)
+                    pos_text = element_text(pos_link)
                     if pos_text.isdigit():
                         record.position_grch37 = int(pos_text)
             else:
-                pos_text = pos_cell.get_text(strip=True)
+                pos_text = texts[4]
                 if pos_text.isdigit():
                     record.position_grch37 = int(pos_text)
             
-            mut_text = cells[5].get_text(strip=True)
+            mut_text = texts[5]
             if mut_text and '->' in mut_text:
                 record.mutation = mut_text
         
         elif num_columns >= 4:
             # 2006-2008 format: Name, Haplogroup, Citations, RefSNP+Position
-            citations_text = cells[2].get_text(strip=True)
+            citations_text = texts[2]
             if citations_text and citations_text != '&nbsp;':
-                citations = re.split(r';\s*', citations_text)
+                citations = _RE_SPLIT_SEMI.split(citations_text)
                 record.citations = [{'short': c.strip()} for c in citations if c.strip()]
             
             # 2008 combines rs_id and position: "rs2075181; 7606726"
-            rs_cell = cells[3]
-            rs_text = rs_cell.get_text(strip=True)
+            rs_text = texts[3]
             if rs_text:
                 # Try to split rs_id and position
-                rs_match = re.match(r'(rs\d+)\s*[;,]\s*(\d+)', rs_text)
+                rs_match = _RE_RS_POS.match(rs_text)
                 if rs_match:
                     record.rs_id = rs_match.group(1)
                     # This is Build 36 (NCBI36/hg18) for 2008 data
                     record.position_ncbi36 = int(rs_match.group(2))
-                elif re.match(r'rs\d+', rs_text):
+                elif _RE_RS.match(rs_text):
                     record.rs_id = rs_text
         
         return record
@@ -763,40 +1132,60 @@ class SNPIndexParser:
 # GLOSSARY PARSING
 # =============================================================================
 
+def _text_after(element, container) -> str:
+    """Text that follows element inside container, in document order."""
+    parts = []
+    node = element
+    while node is not container:
+        parts.append(node.tail or '')
+        for sibling in node.itersiblings():
+            if isinstance(sibling.tag, str):
+                parts.extend(sibling.itertext())
+            parts.append(sibling.tail or '')
+        node = node.getparent()
+    return ''.join(parts)
+
+
 def parse_glossary(filepath: str, year: str, verbose: bool = False) -> Dict[str, str]:
     """Parse the Glossary HTML file."""
     if verbose:
         print(f"Parsing Glossary: {filepath}")
     
-    with open(filepath, 'r', encoding='utf-8', errors='replace') as f:
-        content = f.read()
+    content = read_html(filepath)
     
-    soup = BeautifulSoup(content, 'html.parser')
+    root = lxml.html.fromstring(content.encode('utf-8'), parser=_HTML_PARSER)
     glossary = {}
     
-    for span in soup.find_all('span', class_='def'):
-        term = span.get_text(strip=True).rstrip(':')
-        definition = ''
-        for sibling in span.next_siblings:
-            if hasattr(sibling, 'name') and sibling.name == 'span':
+    # One XPath query finds every term marker for both passes below
+    def_spans = root.xpath(_GLOSSARY_DEF_XPATH)
+    
+    for span in def_spans:
+        term = element_text(span).rstrip(':')
+        parts = [span.tail or '']
+        for sibling in span.itersiblings():
+            if sibling.tag == 'span':
                 break
-            if isinstance(sibling, NavigableString):
-                definition += str(sibling)
-            elif hasattr(sibling, 'get_text'):
-                definition += sibling.get_text()
+            if isinstance(sibling.tag, str):
+                parts.extend(sibling.itertext())
+            parts.append(sibling.tail or '')
         
-        definition = clean_text(definition)
+        definition = clean_text(''.join(parts))
         if term and definition:
             glossary[term] = definition
     
-    for p in soup.find_all('p'):
-        span = p.find('span', class_='def')
-        if span:
-            term = span.get_text(strip=True).rstrip(':')
-            definition = p.get_text().replace(term + ':', '').replace(term, '')
-            definition = clean_text(definition)
-            if term and definition and term not in glossary:
-                glossary[term] = definition
+    # Paragraphs holding a term, each with its first term marker, in document
+    # order (outermost first where paragraphs nest)
+    paragraphs = {}
+    for span in def_spans:
+        for p in reversed(list(span.iterancestors('p'))):
+            if p not in paragraphs:
+                paragraphs[p] = span
+    
+    for p, span in paragraphs.items():
+        term = element_text(span).rstrip(':')
+        definition = clean_text(_text_after(span, p))
+        if term and definition and term not in glossary:
+            glossary[term] = definition
     
     if verbose:
         print(f"  Extracted {len(glossary)} glossary terms")
@@ -811,21 +1200,44 @@ class ISOGGProcessor:
     """Main processor for ISOGG data files."""
     
     def __init__(self, year: str, verbose: bool = False):
-        self.year = year
+        self.year = sys.intern(year)
         self.verbose = verbose
         self.tree: Dict[str, HaplogroupNode] = {}
         self.snps: List[SNPRecord] = []
         self.glossary: Dict[str, str] = {}
+        self._tree_dict_cache: Optional[Dict[str, Dict]] = None
+        self._snp_columns_cache: Optional[Dict[str, list]] = None
         self.metadata: Dict[str, Any] = {
             'source': 'ISOGG Y-DNA Haplogroup Tree',
             'version': year,
-            'extraction_date': datetime.now().strftime('%Y-%m-%d'),
+            'extraction_date': _EXTRACTION_DATE,
             'processor_version': '1.0.0',
         }
     
+    def _tree_as_dicts(self) -> Dict[str, Dict]:
+        """to_dict() of every tree node, built once and shared by the exporters."""
+        if self._tree_dict_cache is None:
+            self._tree_dict_cache = {k: v.to_dict() for k, v in self.tree.items()}
+        return self._tree_dict_cache
+    
+    def _snp_columns(self) -> Dict[str, list]:
+        """SNP records as one list per SNPRecord field, built once and shared by the exporters."""
+        if self._snp_columns_cache is None:
+            rows = map(operator.attrgetter(*_SNP_RECORD_FIELDS), self.snps)
+            columns = list(zip(*rows)) or [()] * len(_SNP_RECORD_FIELDS)
+            self._snp_columns_cache = dict(zip(_SNP_RECORD_FIELDS, map(list, columns)))
+        return self._snp_columns_cache
+    
+    def _snp_dicts(self):
+        """Yield each SNP as SNPRecord.to_dict() would, built from the columns."""
+        for row in zip(*self._snp_columns().values()):
+            yield {key: value for key, value in zip(_SNP_RECORD_FIELDS, row)
+                   if value is not None and value != []}
+    
     def process_directory(self, input_dir: str) -> None:
         """Process all ISOGG files in a directory."""
-        input_path = Path(input_dir)
+        self._tree_dict_cache = None
+        self._snp_columns_cache = None
         
         if self.verbose:
             print(f"\nProcessing ISOGG {self.year} data from: {input_dir}")
@@ -837,8 +1249,14 @@ class ISOGGProcessor:
             'glossary': None,
         }
         
-        for filepath in input_path.glob('*.html'):
-            file_type = identify_file_type(str(filepath))
+        # File types are decided from names alone, so one scandir pass is
+        # enough; DirEntry.is_file() reuses the type from the directory listing
+        with os.scandir(input_dir) as entries:
+            html_files = [(entry.name, entry.path) for entry in entries
+                          if entry.name.endswith('.html') and entry.is_file()]
+        
+        for filename, filepath in html_files:
+            file_type = _file_type_from_name(filename)
             
             if file_type == 'tree_trunk':
                 files['tree_trunk'] = filepath
@@ -852,10 +1270,10 @@ class ISOGGProcessor:
         
         if files['tree_trunk']:
             parser = TreeParser(self.year, self.verbose)
-            self.tree = parser.parse_tree_trunk(str(files['tree_trunk']))
+            self.tree = parser.parse_tree_trunk(files['tree_trunk'])
             
             for letter, filepath in sorted(files['haplogroups'].items()):
-                page_nodes = parser.parse_haplogroup_page(str(filepath), letter)
+                page_nodes = parser.parse_haplogroup_page(filepath, letter)
                 for node_id, node in page_nodes.items():
                     if node_id in self.tree:
                         existing = self.tree[node_id]
@@ -865,17 +1283,17 @@ class ISOGGProcessor:
                             existing.populations = node.populations
                         if node.frequency_notes:
                             existing.frequency_notes = node.frequency_notes
-                        existing_snp_names = {s.name for s in existing.defining_snps}
-                        for snp in node.defining_snps:
-                            if snp.name not in existing_snp_names:
-                                existing.defining_snps.append(snp)
+                        new_snps = [snp for snp in node.defining_snps
+                                    if snp.name not in existing.defining_snp_names]
+                        existing.defining_snps.extend(new_snps)
+                        existing.defining_snp_names.update(snp.name for snp in new_snps)
                     else:
                         self.tree[node_id] = node
         
         if files['snp_index']:
             parser = SNPIndexParser(self.year, self.verbose)
             try:
-                self.snps = parser.parse(str(files['snp_index']))
+                self.snps = parser.parse(files['snp_index'])
             except ValueError as e:
                 if self.verbose:
                     print(f"  Warning: {e}")
@@ -883,43 +1301,36 @@ class ISOGGProcessor:
                 self.snps = []
         
         if files['glossary']:
-            self.glossary = parse_glossary(str(files['glossary']), self.year, self.verbose)
+            self.glossary = parse_glossary(files['glossary'], self.year, self.verbose)
         
         self.metadata['total_haplogroups'] = len(self.tree)
         self.metadata['total_snps'] = len(self.snps)
         self.metadata['glossary_terms'] = len(self.glossary)
     
-    def export_json(self, output_dir: str) -> None:
-        """Export processed data to JSON files."""
+    def export_json(self, output_dir: str, pretty: bool = False) -> None:
+        """Export processed data to JSON files.
+        
+        tree.json and snp_index.json are compact unless pretty is set;
+        glossary.json and metadata.json are always indented.
+        """
         output_path = Path(output_dir)
         output_path.mkdir(parents=True, exist_ok=True)
         
-        tree_output = {
-            'metadata': self.metadata,
-            'tree': {k: v.to_dict() for k, v in self.tree.items()},
-        }
+        write_json_stream(output_path / 'tree.json', self.metadata, 'tree',
+                          self._tree_as_dicts().items(), pretty=pretty)
         
-        with open(output_path / 'tree.json', 'w', encoding='utf-8') as f:
-            json.dump(tree_output, f, indent=2, ensure_ascii=False)
-        
-        snp_output = {
-            'metadata': {**self.metadata, 'record_count': len(self.snps)},
-            'snps': [s.to_dict() for s in self.snps],
-        }
-        
-        with open(output_path / 'snp_index.json', 'w', encoding='utf-8') as f:
-            json.dump(snp_output, f, indent=2, ensure_ascii=False)
+        write_json_stream(output_path / 'snp_index.json',
+                          {**self.metadata, 'record_count': len(self.snps)}, 'snps',
+                          self._snp_dicts(), mapping=False, pretty=pretty)
         
         if self.glossary:
             glossary_output = {
                 'metadata': {'source': 'ISOGG Glossary', 'version': self.year},
                 'terms': self.glossary,
             }
-            with open(output_path / 'glossary.json', 'w', encoding='utf-8') as f:
-                json.dump(glossary_output, f, indent=2, ensure_ascii=False)
+            write_json(output_path / 'glossary.json', glossary_output)
         
-        with open(output_path / 'metadata.json', 'w', encoding='utf-8') as f:
-            json.dump(self.metadata, f, indent=2, ensure_ascii=False)
+        write_json(output_path / 'metadata.json', self.metadata)
         
         if self.verbose:
             print(f"\nExported to: {output_dir}")
@@ -935,48 +1346,64 @@ class ISOGGProcessor:
             writer = csv.writer(f)
             writer.writerow(['id', 'name', 'parent_id', 'depth', 'status', 
                            'is_paragroup', 'defining_snps', 'source_version'])
-            for node in self.tree.values():
-                snps_str = ', '.join(s.name for s in node.defining_snps)
-                writer.writerow([node.id, node.name, node.parent_id or '', node.depth,
-                               node.status, node.is_paragroup, snps_str, node.source_version])
+            writer.writerows(self._haplogroup_rows())
         
         with open(output_path / 'snps.csv', 'w', newline='', encoding='utf-8') as f:
             writer = csv.writer(f)
             writer.writerow(['name', 'haplogroup', 'status', 'aliases', 'rs_id',
                            'position_ncbi36', 'position_grch37', 'position_grch38', 
                            'mutation', 'source_version'])
-            for snp in self.snps:
-                aliases_str = ', '.join(snp.aliases) if snp.aliases else ''
-                writer.writerow([snp.name, snp.haplogroup, snp.status, aliases_str,
-                               snp.rs_id or '', snp.position_ncbi36 or '',
-                               snp.position_grch37 or '', snp.position_grch38 or '',
-                               snp.mutation or '', snp.source_version])
+            writer.writerows(self._snp_rows())
+    
+    def _haplogroup_rows(self):
+        """Yield haplogroups.csv rows."""
+        get = operator.attrgetter('id', 'name', 'parent_id', 'depth', 'status',
+                                  'is_paragroup', 'defining_snps', 'source_version')
+        for node in self.tree.values():
+            hap_id, name, parent_id, depth, status, is_paragroup, snps, version = get(node)
+            yield (hap_id, name, parent_id or '', depth, status, is_paragroup,
+                   ', '.join([s.name for s in snps]), version)
+    
+    def _snp_rows(self):
+        """snps.csv rows, assembled column by column."""
+        cols = self._snp_columns()
+        aliases = [', '.join(a) if a else '' for a in cols['aliases']]
+        optional = [[v or '' for v in cols[key]]
+                    for key in ('rs_id', 'position_ncbi36', 'position_grch37',
+                                'position_grch38', 'mutation')]
+        return zip(cols['name'], cols['haplogroup'], cols['status'], aliases,
+                   *optional, cols['source_version'])
     
     def export_individual_haplogroups(self, output_dir: str) -> Dict[str, str]:
         """Export individual haplogroup files for this year."""
-        tree_dict = {k: v.to_dict() for k, v in self.tree.items()}
-        return export_individual_haplogroups(tree_dict, self.year, output_dir, self.verbose)
+        return export_individual_haplogroups(self._tree_as_dicts(), self.year, output_dir,
+                                             self.verbose)
 
 # =============================================================================
 # INDIVIDUAL HAPLOGROUP EXPORT
 # =============================================================================
 
 # Combined/meta haplogroups that belong in trunk
-TRUNK_HAPLOGROUPS = {
+TRUNK_HAPLOGROUPS = frozenset({
     'Y-Adam', 'BT', 'CT', 'CF', 'DE', 'GHIJK', 'HIJK', 'IJK', 'IJ', 'LT', 
     'NO', 'NOP', 'BR', 'CR',  # Older naming
     'A0-T', 'A0', 'A1',  # Modern A structure
-}
+})
 
 # Major haplogroup letters (roots of each tree)
-MAJOR_HAPLOGROUPS = set('ABCDEFGHIJKLMNOPQRST')
+MAJOR_HAPLOGROUPS = frozenset('ABCDEFGHIJKLMNOPQRST')
 
 
+@functools.lru_cache(maxsize=65536)
 def get_major_haplogroup_letter(hap_id: str) -> Optional[str]:
     """
     Determine which major haplogroup a subclade belongs to.
     Returns the letter (A-T) or None if it's a trunk/combined haplogroup.
     """
+    # Common case: an ordinary subclade id with no trailing '*' to strip
+    if hap_id and hap_id[0] in MAJOR_HAPLOGROUPS and not hap_id.endswith('*'):
+        return None if hap_id in TRUNK_HAPLOGROUPS else hap_id[0]
+    
     clean_id = hap_id.rstrip('*')
     
     # Check if it's a combined/trunk haplogroup
@@ -1019,6 +1446,19 @@ def export_individual_haplogroups(tree: Dict[str, Any], year: str, output_dir: s
     
     exported_files = {}
     
+    # Children of every node, built in one pass over the whole tree; each
+    # output file keeps only the children that fall inside it
+    all_children: Dict[str, set] = defaultdict(set)
+    for hap_id, node in tree.items():
+        parent_id = node.get('parent_id')
+        if parent_id:
+            all_children[parent_id].add(hap_id)
+    
+    # Only nodes that are someone's parent get a 'children' key added; copy
+    # just those so the caller's dicts are left untouched
+    tree = {hap_id: dict(node) if hap_id in all_children else node
+            for hap_id, node in tree.items()}
+    
     # Group haplogroups by their major letter
     haplogroup_groups: Dict[str, Dict[str, Any]] = defaultdict(dict)
     trunk_nodes = {}
@@ -1043,101 +1483,178 @@ def export_individual_haplogroups(tree: Dict[str, Any], year: str, output_dir: s
         if paragroup in haplogroup_groups[letter]:
             trunk_nodes[paragroup] = haplogroup_groups[letter][paragroup]
     
-    # Build children list for trunk nodes
-    trunk_children = defaultdict(list)
-    for hap_id, node in trunk_nodes.items():
-        parent_id = node.get('parent_id')
-        if parent_id and parent_id in trunk_nodes:
-            if hap_id not in trunk_children[parent_id]:
-                trunk_children[parent_id].append(hap_id)
-    
     # Update trunk nodes with children info
-    for hap_id in trunk_nodes:
-        if hap_id in trunk_children:
-            trunk_nodes[hap_id]['children'] = sorted(trunk_children[hap_id])
-    
-    # Export tree trunk
-    trunk_file = output_path / f'TreeTrunk-{year}.json'
-    trunk_output = {
-        'metadata': {
-            'source': 'ISOGG Y-DNA Haplogroup Tree',
-            'version': year,
-            'type': 'tree_trunk',
-            'description': 'Top-level haplogroups including combined clades (BR, CR, DE, etc.) and major haplogroup roots (A, B, C, etc.)',
-            'extraction_date': datetime.now().strftime('%Y-%m-%d'),
-            'total_nodes': len(trunk_nodes),
-            'major_haplogroups': sorted([h for h in trunk_nodes.keys() if h.rstrip('*') in MAJOR_HAPLOGROUPS]),
-        },
-        'tree': trunk_nodes,
-    }
-    
-    with open(trunk_file, 'w', encoding='utf-8') as f:
-        json.dump(trunk_output, f, indent=2, ensure_ascii=False)
-    
-    exported_files['TreeTrunk'] = str(trunk_file)
-    
-    if verbose:
-        print(f"    TreeTrunk-{year}.json: {len(trunk_nodes)} nodes")
-    
-    # Export each major haplogroup
-    for letter in sorted(haplogroup_groups.keys()):
-        nodes = haplogroup_groups[letter]
-        
-        if not nodes:
-            continue
-        
-        # Find the root node for this haplogroup
-        root_id = letter
-        root_node = nodes.get(letter)
-        
-        # Get parent of root from the original tree (for reference to trunk)
-        root_parent = root_node.get('parent_id') if root_node else None
-        
-        # Build children lists within this haplogroup
-        hap_children = defaultdict(list)
-        for hap_id, node in nodes.items():
-            parent_id = node.get('parent_id')
-            if parent_id and parent_id in nodes:
-                if hap_id not in hap_children[parent_id]:
-                    hap_children[parent_id].append(hap_id)
-        
-        # Update nodes with children info
-        for hap_id in nodes:
-            if hap_id in hap_children:
-                nodes[hap_id]['children'] = sorted(hap_children[hap_id])
-        
-        hap_file = output_path / f'Haplogroup_{letter}-{year}.json'
-        hap_output = {
+    for hap_id, children in _scoped_children(all_children, trunk_nodes).items():
+        trunk_nodes[hap_id]['children'] = children
+    
+    # One job per major haplogroup; trunk children are already set above,
+    # so the nodes are final by the time they are sent to a worker
+    jobs = [(letter, nodes, _scoped_children(all_children, nodes), year, str(output_path))
+            for letter, nodes in sorted(haplogroup_groups.items()) if nodes]
+    
+    # Each letter file is independent, so large trees write them in worker
+    # processes while the trunk is written here
+    executor = ProcessPoolExecutor() if len(jobs) > 4 else None
+    try:
+        results = executor.map(_write_haplogroup_file, jobs) if executor else None
+        
+        # Export tree trunk
+        trunk_file = output_path / f'TreeTrunk-{year}.json'
+        trunk_output = {
             'metadata': {
                 'source': 'ISOGG Y-DNA Haplogroup Tree',
                 'version': year,
-                'type': 'haplogroup',
-                'major_haplogroup': letter,
-                'root_haplogroup': root_id,
-                'root_parent': root_parent,
-                'extraction_date': datetime.now().strftime('%Y-%m-%d'),
-                'total_subclades': len(nodes),
+                'type': 'tree_trunk',
+                'description': 'Top-level haplogroups including combined clades (BR, CR, DE, etc.) and major haplogroup roots (A, B, C, etc.)',
+                'extraction_date': _EXTRACTION_DATE,
+                'total_nodes': len(trunk_nodes),
+                'major_haplogroups': sorted([h for h in trunk_nodes.keys() if h.rstrip('*') in MAJOR_HAPLOGROUPS]),
             },
-            'tree': nodes,
+            'tree': trunk_nodes,
         }
         
-        with open(hap_file, 'w', encoding='utf-8') as f:
-            json.dump(hap_output, f, indent=2, ensure_ascii=False)
+        write_json(trunk_file, trunk_output)
         
-        exported_files[letter] = str(hap_file)
+        exported_files['TreeTrunk'] = str(trunk_file)
         
         if verbose:
-            print(f"    Haplogroup_{letter}-{year}.json: {len(nodes)} subclades")
+            print(f"    TreeTrunk-{year}.json: {len(trunk_nodes)} nodes")
+        
+        # Export each major haplogroup
+        for letter, hap_file, num_nodes in results or map(_write_haplogroup_file, jobs):
+            exported_files[letter] = hap_file
+            if verbose:
+                print(f"    Haplogroup_{letter}-{year}.json: {num_nodes} subclades")
+    finally:
+        if executor:
+            executor.shutdown()
     
     return exported_files
 
 
+def _scoped_children(all_children: Dict[str, set], nodes: Dict[str, Any]) -> Dict[str, List[str]]:
+    """Sorted children of each node in nodes, restricted to ids within nodes."""
+    scoped = {}
+    for hap_id in nodes:
+        children = all_children.get(hap_id)
+        if children:
+            children = children.intersection(nodes)
+            if children:
+                scoped[hap_id] = sorted(children)
+    return scoped
+
+
+def _write_haplogroup_file(job: Tuple[str, Dict[str, Any], Dict[str, List[str]], str, str]
+                           ) -> Tuple[str, str, int]:
+    """Write one Haplogroup_{letter}-{year}.json file (may run in a worker process).
+    
+    Returns (letter, file path, node count).
+    """
+    letter, nodes, hap_children, year, output_dir = job
+    
+    # Find the root node for this haplogroup
+    root_id = letter
+    root_node = nodes.get(letter)
+    
+    # Get parent of root from the original tree (for reference to trunk)
+    root_parent = root_node.get('parent_id') if root_node else None
+    
+    # Update nodes with children info
+    for hap_id, children in hap_children.items():
+        nodes[hap_id]['children'] = children
+    
+    hap_file = Path(output_dir) / f'Haplogroup_{letter}-{year}.json'
+    hap_output = {
+        'metadata': {
+            'source': 'ISOGG Y-DNA Haplogroup Tree',
+            'version': year,
+            'type': 'haplogroup',
+            'major_haplogroup': letter,
+            'root_haplogroup': root_id,
+            'root_parent': root_parent,
+            'extraction_date': _EXTRACTION_DATE,
+            'total_subclades': len(nodes),
+        },
+        'tree': nodes,
+    }
+    
+    write_json(hap_file, hap_output)
+    
+    return letter, str(hap_file), len(nodes)
+
+
+# =============================================================================
+# BATCH PROCESSING
+# =============================================================================
+
+def _process_year_dir(job: Tuple[str, str, bool, bool, bool]) -> Tuple[str, int, int]:
+    """Process one year directory and write its outputs (runs in a worker process).
+    
+    Outputs are written by the worker itself so only a small summary is
+    sent back to the parent process.
+    """
+    year_dir, output_dir, export_csv, verbose, pretty = job
+    year = Path(year_dir).name
+    processor = ISOGGProcessor(year, verbose)
+    processor.process_directory(year_dir)
+    processor.export_json(output_dir, pretty)
+    if export_csv:
+        processor.export_csv(output_dir)
+    return year, len(processor.tree), len(processor.snps)
+
+
+def process_batch(year_dirs: List[str], output_dir: str, export_csv: bool = False,
+                  verbose: bool = False, max_workers: Optional[int] = None,
+                  pretty: bool = False) -> List[str]:
+    """Process several year directories in parallel, one worker process per year.
+    
+    Years are independent until the merge step, so each is parsed and
+    exported in its own process. Returns the per-year output directories.
+    """
+    output_path = Path(output_dir)
+    jobs = [(year_dir, str(output_path / Path(year_dir).name), export_csv, verbose, pretty)
+            for year_dir in sorted(year_dirs)]
+    
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for year, num_haplogroups, num_snps in executor.map(_process_year_dir, jobs):
+            if verbose:
+                print(f"  {year}: {num_haplogroups} haplogroups, {num_snps} SNPs")
+    
+    return [job[1] for job in jobs]
+
 # =============================================================================
 # MERGER
 # =============================================================================
 
-def merge_years(year_dirs: List[str], output_dir: str, verbose: bool = False) -> None:
-    """Merge multiple years into a master dataset."""
+def _load_year(year_dir: str) -> Tuple[str, Optional[Dict], Optional[List]]:
+    """Load (year, tree, snps) from a year's output directory; None for a missing file."""
+    year_path = Path(year_dir)
+    year = sys.intern(year_path.name)
+    
+    tree = snps = None
+    tree_file = year_path / 'tree.json'
+    if tree_file.exists():
+        tree = read_json(tree_file).get('tree', {})
+    
+    snp_file = year_path / 'snp_index.json'
+    if snp_file.exists():
+        snps = read_json(snp_file).get('snps', [])
+    
+    return year, tree, snps
+
+
+def _intern(value: Any) -> Any:
+    """sys.intern for strings; the same few statuses and labels repeat across every year."""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+# SNP fields where a later year's non-empty value replaces the merged one
+_SNP_MERGE_KEYS = ('haplogroup', 'status', 'position_grch37', 'mutation', 'rs_id')
+
+
+def merge_years(year_dirs: List[str], output_dir: str, verbose: bool = False,
+                pretty: bool = False) -> None:
+    """Merge multiple years into a master dataset (compact JSON unless pretty)."""
     if verbose:
         print(f"\nMerging {len(year_dirs)} years...")
     
@@ -1147,57 +1664,62 @@ def merge_years(year_dirs: List[str], output_dir: str, verbose: bool = False) ->
     all_trees = {}
     all_snps = {}
     
-    for year_dir in sorted(year_dirs):
-        year_path = Path(year_dir)
-        year = year_path.name
-        
-        tree_file = year_path / 'tree.json'
-        if tree_file.exists():
-            with open(tree_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                all_trees[year] = data.get('tree', {})
-        
-        snp_file = year_path / 'snp_index.json'
-        if snp_file.exists():
-            with open(snp_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                all_snps[year] = data.get('snps', [])
-    
-    # Merge trees
+    # Years load independently; threads overlap the file reads
+    with ThreadPoolExecutor(max_workers=max(1, min(8, len(year_dirs)))) as executor:
+        for year, tree, snps in executor.map(_load_year, sorted(year_dirs)):
+            if tree is not None:
+                all_trees[year] = tree
+            if snps is not None:
+                all_snps[year] = snps
+    
+    # Merge trees. A haplogroup id occurs at most once per year, so each node's
+    # per-year lists are allocated at full size up front and filled by year
+    # index; slots for years the node is absent from are dropped afterwards
     master_tree = {}
-    for year in sorted(all_trees.keys()):
+    tree_years = sorted(all_trees.keys())
+    num_years = len(tree_years)
+    for year_idx, year in enumerate(tree_years):
         tree = all_trees[year]
         for hap_id, node in tree.items():
-            if hap_id not in master_tree:
+            status = _intern(node.get('status'))
+            parent_id = node.get('parent_id')
+            defining_snps = node.get('defining_snps', [])
+            history_entry = {
+                'version': year,
+                'status': status,
+                'parent_id': parent_id,
+                'defining_snps': defining_snps,
+            }
+            existing = master_tree.get(hap_id)
+            if existing is None:
+                versions_present = [None] * num_years
+                version_history = [None] * num_years
+                versions_present[year_idx] = year
+                version_history[year_idx] = history_entry
                 master_tree[hap_id] = {
                     **node,
                     'first_appeared': year,
-                    'versions_present': [year],
-                    'version_history': [{
-                        'version': year,
-                        'status': node.get('status'),
-                        'parent_id': node.get('parent_id'),
-                        'defining_snps': node.get('defining_snps', []),
-                    }],
+                    'versions_present': versions_present,
+                    'version_history': version_history,
                 }
-            else:
-                existing = master_tree[hap_id]
-                existing['versions_present'].append(year)
-                history_entry = {
-                    'version': year,
-                    'status': node.get('status'),
-                    'parent_id': node.get('parent_id'),
-                    'defining_snps': node.get('defining_snps', []),
-                }
-                existing['version_history'].append(history_entry)
-                existing['status'] = node.get('status')
-                existing['parent_id'] = node.get('parent_id')
-                existing['defining_snps'] = node.get('defining_snps', [])
-                existing['children'] = node.get('children', [])
-                if node.get('description'):
-                    existing['description'] = node['description']
-    
-    # Merge SNPs
+                continue
+            existing['versions_present'][year_idx] = year
+            existing['version_history'][year_idx] = history_entry
+            existing['status'] = status
+            existing['parent_id'] = parent_id
+            existing['defining_snps'] = defining_snps
+            existing['children'] = node.get('children', [])
+            if node.get('description'):
+                existing['description'] = node['description']
+    
+    for node in master_tree.values():
+        versions_present = node['versions_present']
+        if None in versions_present:
+            node['versions_present'] = [v for v in versions_present if v is not None]
+            node['version_history'] = [h for h in node['version_history'] if h is not None]
+    
+    # Merge SNPs (a name can repeat within one year's index, so these keep
+    # appending one history entry per occurrence)
     master_snps = {}
     for year in sorted(all_snps.keys()):
         snps = all_snps[year]
@@ -1205,62 +1727,52 @@ def merge_years(year_dirs: List[str], output_dir: str, verbose: bool = False) ->
             name = snp.get('name')
             if not name:
                 continue
-            if name not in master_snps:
+            history_entry = {
+                'version': year,
+                'haplogroup': _intern(snp.get('haplogroup')),
+                'status': _intern(snp.get('status')),
+                'position_grch37': snp.get('position_grch37'),
+            }
+            existing = master_snps.get(name)
+            if existing is None:
                 master_snps[name] = {
                     **snp,
                     'first_appeared': year,
                     'versions_present': [year],
-                    'version_history': [{
-                        'version': year,
-                        'haplogroup': snp.get('haplogroup'),
-                        'status': snp.get('status'),
-                        'position_grch37': snp.get('position_grch37'),
-                    }],
-                }
-            else:
-                existing = master_snps[name]
-                existing['versions_present'].append(year)
-                history_entry = {
-                    'version': year,
-                    'haplogroup': snp.get('haplogroup'),
-                    'status': snp.get('status'),
-                    'position_grch37': snp.get('position_grch37'),
+                    'version_history': [history_entry],
                 }
-                existing['version_history'].append(history_entry)
-                for key in ['haplogroup', 'status', 'position_grch37', 'mutation', 'rs_id']:
-                    if snp.get(key):
-                        existing[key] = snp[key]
-                if snp.get('aliases'):
-                    existing_aliases = set(existing.get('aliases', []))
-                    existing_aliases.update(snp['aliases'])
-                    existing['aliases'] = list(existing_aliases)
+                continue
+            existing['versions_present'].append(year)
+            existing['version_history'].append(history_entry)
+            for key in _SNP_MERGE_KEYS:
+                value = snp.get(key)
+                if value:
+                    existing[key] = value
+            if snp.get('aliases'):
+                existing_aliases = set(existing.get('aliases', []))
+                existing_aliases.update(snp['aliases'])
+                existing['aliases'] = list(existing_aliases)
     
     # Write outputs
-    master_tree_output = {
-        'metadata': {
-            'source': 'ISOGG Y-DNA Haplogroup Tree (Merged)',
-            'years_included': sorted(all_trees.keys()),
-            'extraction_date': datetime.now().strftime('%Y-%m-%d'),
-            'total_haplogroups': len(master_tree),
-        },
-        'tree': master_tree,
+    master_tree_metadata = {
+        'source': 'ISOGG Y-DNA Haplogroup Tree (Merged)',
+        'years_included': sorted(all_trees.keys()),
+        'extraction_date': _EXTRACTION_DATE,
+        'total_haplogroups': len(master_tree),
     }
     
-    with open(output_path / 'master_tree.json', 'w', encoding='utf-8') as f:
-        json.dump(master_tree_output, f, indent=2, ensure_ascii=False)
+    write_json_stream(output_path / 'master_tree.json', master_tree_metadata, 'tree',
+                      master_tree.items(), pretty=pretty)
     
-    master_snps_output = {
-        'metadata': {
-            'source': 'ISOGG SNP Index (Merged)',
-            'years_included': sorted(all_snps.keys()),
-            'extraction_date': datetime.now().strftime('%Y-%m-%d'),
-            'total_snps': len(master_snps),
-        },
-        'snps': list(master_snps.values()),
+    master_snps_metadata = {
+        'source': 'ISOGG SNP Index (Merged)',
+        'years_included': sorted(all_snps.keys()),
+        'extraction_date': _EXTRACTION_DATE,
+        'total_snps': len(master_snps),
     }
     
-    with open(output_path / 'master_snps.json', 'w', encoding='utf-8') as f:
-        json.dump(master_snps_output, f, indent=2, ensure_ascii=False)
+    write_json_stream(output_path / 'master_snps.json', master_snps_metadata, 'snps',
+                      master_snps.values(), mapping=False, pretty=pretty)
     
     if verbose:
         print(f"Merged output written to: {output_dir}")
@@ -1282,7 +1794,13 @@ def main():
     parser.add_argument('--input', '-i', type=str, required=True, help='Input directory')
     parser.add_argument('--output', '-o', type=str, required=True, help='Output directory')
     parser.add_argument('--merge', action='store_true', help='Merge multiple year directories')
+    parser.add_argument('--batch', action='store_true',
+                        help='Process every year subdirectory of the input directory in parallel')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker processes for --batch (default: CPU count)')
     parser.add_argument('--csv', action='store_true', help='Also export to CSV format')
+    parser.add_argument('--pretty', action='store_true',
+                        help='Indent tree/SNP JSON outputs (default: compact)')
     parser.add_argument('--verbose', '-v', action='store_true', help='Enable verbose output')
     
     args = parser.parse_args()
@@ -1293,7 +1811,14 @@ def main():
         if not year_dirs:
             print("Error: No year directories found in input path")
             sys.exit(1)
-        merge_years(year_dirs, args.output, args.verbose)
+        merge_years(year_dirs, args.output, args.verbose, args.pretty)
+    elif args.batch:
+        input_path = Path(args.input)
+        year_dirs = [str(d) for d in input_path.iterdir() if d.is_dir() and d.name.isdigit()]
+        if not year_dirs:
+            print("Error: No year directories found in input path")
+            sys.exit(1)
+        process_batch(year_dirs, args.output, args.csv, args.verbose, args.workers, args.pretty)
     else:
         if not args.year:
             for f in Path(args.input).glob('*.html'):
@@ -1301,6 +1826,13 @@ def main():
                 if year:
                     args.year = year
                     break
+            else:
+                # Fall back to the page heading; the read is reused by the parse
+                for f in Path(args.input).glob('*.html'):
+                    year = detect_year(str(f), read_html(str(f)))
+                    if year:
+                        args.year = year
+                        break
         
         if not args.year:
             print("Error: Could not detect year. Please specify with --year")
@@ -1308,7 +1840,7 @@ def main():
         
         processor = ISOGGProcessor(args.year, args.verbose)
         processor.process_directory(args.input)
-        processor.export_json(args.output)
+        processor.export_json(args.output, args.pretty)
         
         if args.csv:
             processor.export_csv(args.output)
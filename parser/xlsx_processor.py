@@ -16,40 +16,120 @@ Each row typically has:
 - SNP list in the next column
 """
 
+import csv
 import json
 import os
 import re
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
 from dataclasses import dataclass, field, asdict
-from typing import Optional, List, Dict, Any, Tuple
+from itertools import chain, islice
+from typing import Optional, List, Dict, Any, Iterator, Tuple
 from pathlib import Path
 import openpyxl
-from openpyxl.worksheet.worksheet import Worksheet
 
+try:
+    import orjson
+except ImportError:  # fall back to the stdlib encoder
+    orjson = None
 
-@dataclass
-class HaplogroupNode:
-    """Represents a single haplogroup in the tree."""
-    name: str
-    snps: List[str] = field(default_factory=list)
-    depth: int = 0
-    parent_id: Optional[str] = None
-    children: List[str] = field(default_factory=list)
-    order_index: int = 0
-    is_investigational: bool = False  # True if name ends with ~
-    
-    def to_dict(self) -> dict:
-        return {
-            'name': self.name,
-            'snps': self.snps,
-            'depth': self.depth,
-            'parent_id': self.parent_id,
-            'children': self.children,
-            'order_index': self.order_index,
-            'is_investigational': self.is_investigational
-        }
+
+# Haplogroup names: letter(s) followed by optional numbers/letters, ending
+# with optional ~ (A, A0, A00, A1b1, R1b1a1b1a1a2c1a, I2a1~)
+_HAPLO_NAME_RE = re.compile(r'^[A-Z][0-9a-zA-Z\-]*~?$')
+_SNP_PART_RE = re.compile(r'^[A-Z0-9][A-Z0-9\.\-/]+$', re.IGNORECASE)
+
+# Lowercase fragments of metadata/header text in tree sheets; any cell
+# containing one is skipped. Matched as one alternation in a single scan.
+_SKIP_TERMS = (
+    'could you adopt', 'downloading', 'version', 'criteria',
+    'contact', 'font colors', 'symbols', 'click on', 'e-mail',
+    'haplogroup tree', 'subclades', 'main page', 'listing',
+    'papers', 'glossary', 'copyright', 'links:', 'newly confirmed',
+    'investigational', 'did you notice', 'just below',
+    'et al', 'journal', 'abstract', 'doi:', 'genetics', 'phylogen',
+    'chromosom', 'american', 'lineage', 'revised', 'origin', 'diversity',
+)
+_SKIP_RE = re.compile('|'.join(map(re.escape, _SKIP_TERMS)))
+
+# File name patterns used by process_year_xlsx
+_HG_FILE_RE = re.compile(r'(Haplogroup|2019-2020 Haplogroup|2019Haplogroup)\s*([A-T])\s*(Tree)?\.xlsx', re.IGNORECASE)
+_TRUNK_FILE_RE = re.compile(r'(Tree\s*Trunk|TreeTrunk|2019TreeTrunk)\.xlsx', re.IGNORECASE)
+_SNP_FILE_RE = re.compile(r'SNP\s*Index', re.IGNORECASE)
+
+
+def write_json(path, obj: Any) -> None:
+    """Write obj as 2-space indented UTF-8 JSON, with orjson when installed."""
+    if orjson is not None:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(obj, f, indent=2, ensure_ascii=False)
+
+
+def _iter_rows(filepath: str) -> Iterator[tuple]:
+    """Stream the active sheet as value tuples, row 1 first.
+    
+    The workbook is opened read-only, which streams the sheet XML instead of
+    building a Cell for every position. Rows are not padded, so use _cell()
+    to index them. Formulas are kept as text (data_only is not set) so
+    =HYPERLINK cells can still be recognised and skipped. The workbook is
+    closed when the generator is exhausted or closed.
+    """
+    wb = openpyxl.load_workbook(filepath, read_only=True)
+    try:
+        ws = wb.active
+        # Stored dimensions can be missing or stale; read to the real end
+        ws.reset_dimensions()
+        yield from ws.iter_rows(values_only=True)
+    finally:
+        wb.close()
+
+
+def _cell(row: tuple, col_idx: int) -> Any:
+    """Value at 1-based col_idx of a row from _iter_rows (None past its end)."""
+    return row[col_idx - 1] if col_idx <= len(row) else None
+
+
+def _first_value(row: tuple, cols: Tuple[int, ...]) -> Any:
+    """First truthy value among cols (1-based, 0 = absent column), else the last one read.
+    
+    Same result as `a or b or ...` over those cells.
+    """
+    val = None
+    for col_idx in cols:
+        val = row[col_idx - 1] if 0 < col_idx <= len(row) else None
+        if val:
+            break
+    return val
 
 
-@dataclass
+# SNP Index header names tried for each field, in priority order
+_SNP_COLUMN_KEYS = {
+    'name': ('name', 'snp name', 'snp'),
+    'haplogroup': ('subgroup name', 'haplogroup'),
+    'alternate_names': ('alternate names', 'other names'),
+    'rs_number': ('rs numbers', 'rs #', 'rs number'),
+    'build37': ('build 37 number', 'build 37 #'),
+    'build38': ('build 38 number', 'build 38 #'),
+    'mutation': ('mutation info', 'mutation'),
+}
+
+
+@dataclass(slots=True)
+class _SNPColumns:
+    """Candidate column indices per SNP Index field, resolved once per sheet."""
+    name: Tuple[int, ...]
+    haplogroup: Tuple[int, ...]
+    alternate_names: Tuple[int, ...]
+    rs_number: Tuple[int, ...]
+    build37: Tuple[int, ...]
+    build38: Tuple[int, ...]
+    mutation: Tuple[int, ...]
+
+
+@dataclass(slots=True)
 class SNPEntry:
     """Represents a SNP with mutation information."""
     name: str
@@ -77,72 +157,96 @@ class XLSXTreeParser:
     
     def __init__(self, filepath: str):
         self.filepath = filepath
-        self.nodes: Dict[str, HaplogroupNode] = {}
+        self.nodes: Dict[str, Dict[str, Any]] = {}
         self.root_nodes: List[str] = []
         
-    def parse(self) -> Dict[str, HaplogroupNode]:
-        """Parse the XLSX file and return haplogroup nodes."""
-        wb = openpyxl.load_workbook(self.filepath)
-        ws = wb.active
+    def parse(self) -> Dict[str, Dict[str, Any]]:
+        """Parse the XLSX file and return haplogroup nodes.
         
-        # Find where tree data starts (look for 'Y' or 'Root' pattern)
-        start_row = self._find_tree_start(ws)
-        if start_row is None:
-            print(f"Warning: Could not find tree start in {self.filepath}")
-            return {}
-        
-        # Parse tree data
-        order_index = 0
-        parent_stack: List[Tuple[int, str]] = []  # (depth, name) stack
-        
-        for row_idx in range(start_row, ws.max_row + 1):
-            result = self._parse_row(ws, row_idx)
-            if result is None:
-                continue
-                
-            name, snps, depth = result
-            
-            # Skip empty or whitespace-only names
-            if not name or not name.strip():
-                continue
-            
-            name = name.strip()
-            
-            # Check if investigational (ends with ~)
-            is_investigational = name.endswith('~')
-            
-            # Create node
-            node = HaplogroupNode(
-                name=name,
-                snps=snps,
-                depth=depth,
-                order_index=order_index,
-                is_investigational=is_investigational
-            )
-            order_index += 1
+        Nodes are stored as their output dicts (name, snps, depth, parent_id,
+        children, order_index, is_investigational) so export needs no copy.
+        """
+        with closing(_iter_rows(self.filepath)) as rows:
+            # Only the first rows are searched for the start; the rest stream
+            head = list(islice(rows, 99))
             
-            # Update parent stack and set parent
-            while parent_stack and parent_stack[-1][0] >= depth:
-                parent_stack.pop()
+            # Find where tree data starts (look for 'Y' or 'Root' pattern)
+            start_row = self._find_tree_start(head)
+            if start_row is None:
+                print(f"Warning: Could not find tree start in {self.filepath}")
+                return {}
             
-            if parent_stack:
-                node.parent_id = parent_stack[-1][1]
-                # Add as child to parent
-                if node.parent_id in self.nodes:
-                    self.nodes[node.parent_id].children.append(name)
-            else:
-                self.root_nodes.append(name)
+            # Parse tree data
+            order_index = 0
+            # Latest node at each depth on the current path; _parse_row scans
+            # 29 columns, so depth is at most 28. Slots deeper than `top` are
+            # always None.
+            path: List[Optional[str]] = [None] * 29
+            top = -1
+            # (parent's children list, child name), applied after the row loop
+            child_edges: List[Tuple[List[str], str]] = []
             
-            parent_stack.append((depth, name))
-            self.nodes[name] = node
+            for row in chain(head[start_row - 1:], rows):
+                result = self._parse_row(row)
+                if result is None:
+                    continue
+                    
+                name, snps, depth = result
+                
+                # Skip empty or whitespace-only names
+                if not name or not name.strip():
+                    continue
+                
+                name = name.strip()
+                
+                # Check if investigational (ends with ~)
+                is_investigational = name.endswith('~')
+                
+                # Parent is the nearest shallower node on the path (depth
+                # can skip levels, so empty slots are passed over)
+                parent_depth = min(depth, top + 1) - 1
+                while parent_depth >= 0 and path[parent_depth] is None:
+                    parent_depth -= 1
+                
+                parent_id = None
+                if parent_depth >= 0:
+                    parent_id = path[parent_depth]
+                    # Parents always precede their children, so the lookup
+                    # cannot miss; the append itself waits for the post-pass
+                    child_edges.append((self.nodes[parent_id]['children'], name))
+                else:
+                    self.root_nodes.append(name)
+                
+                # Create node
+                node = {
+                    'name': name,
+                    'snps': snps,
+                    'depth': depth,
+                    'parent_id': parent_id,
+                    'children': [],
+                    'order_index': order_index,
+                    'is_investigational': is_investigational,
+                }
+                order_index += 1
+                
+                # This node replaces its depth and ends any deeper branch
+                if top > depth:
+                    path[depth + 1:top + 1] = [None] * (top - depth)
+                path[depth] = name
+                top = depth
+                self.nodes[name] = node
+        
+        # Edges are recorded in row order, so children keep order_index order
+        for children, name in child_edges:
+            children.append(name)
         
         return self.nodes
     
-    def _find_tree_start(self, ws: Worksheet) -> Optional[int]:
-        """Find the row where tree data starts."""
-        for row_idx in range(1, min(100, ws.max_row + 1)):
-            for col_idx in range(1, 10):
-                val = ws.cell(row=row_idx, column=col_idx).value
+    def _find_tree_start(self, rows: List[tuple]) -> Optional[int]:
+        """Find the row where tree data starts (searches the first 99 rows)."""
+        for row_idx, row in enumerate(rows[:99], 1):
+            # Columns 1-9; rows are unpadded, so only populated cells are visited
+            for col_idx, val in enumerate(row[:9], 1):
                 if val and isinstance(val, str):
                     val_clean = val.strip()
                     # Look for 'Y' as root or 'Root (Y-Adam)'
@@ -154,7 +258,7 @@ class XLSXTreeParser:
                     # These files start with their root haplogroup
                     if len(val_clean) == 1 and val_clean in 'ABCDEFGHIJKLMNOPQRST':
                         # Verify next column has SNP-like data
-                        next_val = ws.cell(row=row_idx, column=col_idx + 1).value
+                        next_val = _cell(row, col_idx + 1)
                         if next_val and isinstance(next_val, str):
                             # Check if it looks like SNPs (e.g., "M60, M181/Page32")
                             if ',' in next_val or '/' in next_val:
@@ -165,7 +269,7 @@ class XLSXTreeParser:
                         return row_idx
         return None
     
-    def _parse_row(self, ws: Worksheet, row_idx: int) -> Optional[Tuple[str, List[str], int]]:
+    def _parse_row(self, row: tuple) -> Optional[Tuple[str, List[str], int]]:
         """
         Parse a row to extract haplogroup name, SNPs, and depth.
         Returns (name, snps, depth) or None if row is empty/invalid.
@@ -175,8 +279,9 @@ class XLSXTreeParser:
         depth = 0
         
         # Scan columns to find haplogroup name (first non-empty cell that looks like a haplogroup)
-        for col_idx in range(1, 30):  # Check up to column 30
-            val = ws.cell(row=row_idx, column=col_idx).value
+        # Check up to column 29; rows are unpadded, so trailing empty columns
+        # are not visited at all
+        for col_idx, val in enumerate(row[:29], 1):
             if val is None:
                 continue
             
@@ -190,15 +295,7 @@ class XLSXTreeParser:
                 continue
             
             # Skip metadata/header text
-            if any(skip in val_str.lower() for skip in [
-                'could you adopt', 'downloading', 'version', 'criteria',
-                'contact', 'font colors', 'symbols', 'click on', 'e-mail',
-                'haplogroup tree', 'subclades', 'main page', 'listing',
-                'papers', 'glossary', 'copyright', 'links:', 'newly confirmed',
-                'investigational', 'did you notice', 'just below',
-                'et al', 'journal', 'abstract', 'doi:', 'genetics', 'phylogen',
-                'chromosom', 'american', 'lineage', 'revised', 'origin', 'diversity'
-            ]):
+            if _SKIP_RE.search(val_str.lower()):
                 continue
             
             # Skip special markers
@@ -211,7 +308,7 @@ class XLSXTreeParser:
                 depth = col_idx - 1  # Column 1 = depth 0
                 
                 # Next column should have SNPs
-                next_val = ws.cell(row=row_idx, column=col_idx + 1).value
+                next_val = _cell(row, col_idx + 1)
                 if next_val:
                     snps = self._parse_snps(str(next_val))
                 break
@@ -219,7 +316,7 @@ class XLSXTreeParser:
             # Check if this looks like SNP list (comma separated with alphanumeric codes)
             if col_idx > 1 and ',' in val_str and self._looks_like_snp_list(val_str):
                 # Previous column had the name
-                prev_val = ws.cell(row=row_idx, column=col_idx - 1).value
+                prev_val = _cell(row, col_idx - 1)
                 if prev_val and self._is_haplogroup_name(str(prev_val).strip()):
                     name = str(prev_val).strip()
                     depth = col_idx - 2
@@ -247,9 +344,7 @@ class XLSXTreeParser:
             return True
         
         # Pattern: Letter(s) followed by optional numbers/letters, ending with optional ~
-        # Examples: A, A0, A00, A1b1, R1b1a1b1a1a2c1a, I2a1~
-        pattern = r'^[A-Z][0-9a-zA-Z\-]*~?$'
-        if re.match(pattern, val):
+        if _HAPLO_NAME_RE.match(val):
             return True
         
         return False
@@ -264,7 +359,7 @@ class XLSXTreeParser:
         snp_like = 0
         for part in parts[:5]:  # Check first 5
             part = part.strip()
-            if re.match(r'^[A-Z0-9][A-Z0-9\.\-/]+$', part, re.IGNORECASE):
+            if _SNP_PART_RE.match(part):
                 snp_like += 1
         
         return snp_like >= 2
@@ -285,14 +380,13 @@ class XLSXTreeParser:
     def to_dict(self) -> dict:
         """Convert parsed data to dictionary format."""
         return {
-            'nodes': {name: node.to_dict() for name, node in self.nodes.items()},
+            'nodes': self.nodes,
             'root_nodes': self.root_nodes
         }
     
     def to_json(self, filepath: str):
         """Save parsed data to JSON file."""
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+        write_json(filepath, self.to_dict())
 
 
 class XLSXSNPIndexParser:
@@ -304,62 +398,58 @@ class XLSXSNPIndexParser:
     
     def parse(self) -> Dict[str, SNPEntry]:
         """Parse the SNP Index XLSX file."""
-        wb = openpyxl.load_workbook(self.filepath)
-        ws = wb.active
-        
-        # Find header row (look for 'Name' or 'Subgroup Name')
-        header_row = self._find_header_row(ws)
-        if header_row is None:
-            print(f"Warning: Could not find header in {self.filepath}")
-            return {}
-        
-        # Get column mapping
-        col_map = self._get_column_mapping(ws, header_row)
-        
-        # Parse data rows
-        for row_idx in range(header_row + 1, ws.max_row + 1):
-            entry = self._parse_snp_row(ws, row_idx, col_map)
-            if entry and entry.name:
-                self.snps[entry.name] = entry
+        with closing(_iter_rows(self.filepath)) as rows:
+            # Only the first rows are searched for the header; the rest stream
+            head = list(islice(rows, 19))
+            
+            # Find header row (look for 'Name' or 'Subgroup Name')
+            header_row = self._find_header_row(head)
+            if header_row is None:
+                print(f"Warning: Could not find header in {self.filepath}")
+                return {}
+            
+            # Get column mapping
+            cols = self._resolve_columns(self._get_column_mapping(head[header_row - 1]))
+            
+            # Parse data rows
+            for row in chain(head[header_row:], rows):
+                entry = self._parse_snp_row(row, cols)
+                if entry and entry.name:
+                    self.snps[entry.name] = entry
         
         return self.snps
     
-    def _find_header_row(self, ws: Worksheet) -> Optional[int]:
-        """Find the header row."""
-        for row_idx in range(1, 20):
-            for col_idx in range(1, 10):
-                val = ws.cell(row=row_idx, column=col_idx).value
+    def _find_header_row(self, rows: List[tuple]) -> Optional[int]:
+        """Find the header row (searches the first 19 rows)."""
+        for row_idx, row in enumerate(rows[:19], 1):
+            # Columns 1-9; rows are unpadded, so only populated cells are visited
+            for val in row[:9]:
                 if val and isinstance(val, str):
-                    val_lower = val.lower().strip()
-                    if val_lower in ['name', 'subgroup name']:
+                    if val.lower().strip() in ('name', 'subgroup name'):
                         return row_idx
         return None
     
-    def _get_column_mapping(self, ws: Worksheet, header_row: int) -> Dict[str, int]:
+    def _get_column_mapping(self, header: tuple) -> Dict[str, int]:
         """Get mapping of column names to indices."""
         col_map = {}
         for col_idx in range(1, 20):
-            val = ws.cell(row=header_row, column=col_idx).value
+            val = _cell(header, col_idx)
             if val:
                 val_lower = str(val).lower().strip()
                 col_map[val_lower] = col_idx
         return col_map
     
-    def _parse_snp_row(self, ws: Worksheet, row_idx: int, col_map: Dict[str, int]) -> Optional[SNPEntry]:
+    def _resolve_columns(self, col_map: Dict[str, int]) -> _SNPColumns:
+        """Turn header names into per-field column tuples (0 where a header is missing)."""
+        return _SNPColumns(**{
+            field_name: tuple(col_map.get(key, 0) for key in keys)
+            for field_name, keys in _SNP_COLUMN_KEYS.items()
+        })
+    
+    def _parse_snp_row(self, row: tuple, cols: _SNPColumns) -> Optional[SNPEntry]:
         """Parse a single SNP row."""
-        def get_val(key: str) -> Any:
-            if key in col_map:
-                return ws.cell(row=row_idx, column=col_map[key]).value
-            return None
-        
-        # Get SNP name - could be in 'name' column or second column
-        name = get_val('name')
-        if not name:
-            # Try alternate positions
-            for key in ['snp name', 'snp']:
-                name = get_val(key)
-                if name:
-                    break
+        # Get SNP name - 'name' column, else 'snp name' / 'snp'
+        name = _first_value(row, cols.name)
         
         if not name:
             return None
@@ -369,12 +459,12 @@ class XLSXSNPIndexParser:
             return None
         
         # Get haplogroup
-        haplogroup = get_val('subgroup name') or get_val('haplogroup') or ''
+        haplogroup = _first_value(row, cols.haplogroup) or ''
         if haplogroup:
             haplogroup = str(haplogroup).strip()
         
         # Get alternate names - normalize separators and formatting
-        alt_names_raw = get_val('alternate names') or get_val('other names') or ''
+        alt_names_raw = _first_value(row, cols.alternate_names) or ''
         alt_names = []
         if alt_names_raw:
             # Replace newlines, slashes, and semicolons with commas for consistent splitting
@@ -387,15 +477,15 @@ class XLSXSNPIndexParser:
                     alt_names.append(part)
         
         # Get rs number
-        rs_num = get_val('rs numbers') or get_val('rs #') or get_val('rs number')
+        rs_num = _first_value(row, cols.rs_number)
         if rs_num:
             rs_num = str(rs_num).strip()
             if not rs_num or rs_num == 'None':
                 rs_num = None
         
         # Get build positions
-        build37 = get_val('build 37 number') or get_val('build 37 #')
-        build38 = get_val('build 38 number') or get_val('build 38 #')
+        build37 = _first_value(row, cols.build37)
+        build38 = _first_value(row, cols.build38)
         
         try:
             build37 = int(float(build37)) if build37 else None
@@ -408,7 +498,7 @@ class XLSXSNPIndexParser:
             build38 = None
         
         # Get mutation info
-        mutation = get_val('mutation info') or get_val('mutation')
+        mutation = _first_value(row, cols.mutation)
         if mutation:
             mutation = str(mutation).strip()
         
@@ -428,8 +518,7 @@ class XLSXSNPIndexParser:
     
     def to_json(self, filepath: str):
         """Save to JSON file."""
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+        write_json(filepath, self.to_dict())
 
 
 class ConversionTableParser:
@@ -441,45 +530,67 @@ class ConversionTableParser:
     
     def parse(self) -> Dict[str, Dict[str, str]]:
         """Parse the conversion table TSV file."""
-        with open(self.filepath, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-        
-        if not lines:
-            return {}
-        
-        # Parse header to get year columns
-        header = lines[0].strip().split('\t')
-        
-        # Build conversion mapping
-        for line in lines[1:]:
-            parts = line.strip().split('\t')
-            if len(parts) >= 2:
+        with open(self.filepath, 'r', encoding='utf-8', newline='') as f:
+            # Fields are split on tabs only; quotes are handled below, so an
+            # unbalanced quote can't swallow the following lines
+            reader = csv.reader(f, delimiter='\t', quoting=csv.QUOTE_NONE)
+            header = next(reader, None)
+            if header is None:
+                return {}
+            
+            # Use header years as key
+            from_year = header[0].strip().replace('ISOGG ', '') if header else '2007'
+            to_year = header[1].strip().replace('ISOGG ', '') if len(header) > 1 else '2008'
+            key = f"{from_year}_to_{to_year}"
+            
+            # Build conversion mapping
+            bucket = None
+            for parts in reader:
+                if len(parts) < 2:
+                    continue
                 old_name = parts[0].strip()
                 new_name = parts[1].strip()
+                # Names only present in one year have nothing to convert
+                if not old_name or not new_name:
+                    continue
                 
                 # Handle comma-separated multiple targets
                 if new_name.startswith('"') and new_name.endswith('"'):
                     new_name = new_name[1:-1]  # Remove quotes
                 
-                # Use header years as key
-                from_year = header[0].replace('ISOGG ', '') if header else '2007'
-                to_year = header[1].replace('ISOGG ', '') if len(header) > 1 else '2008'
-                
-                key = f"{from_year}_to_{to_year}"
-                if key not in self.conversions:
-                    self.conversions[key] = {}
-                
-                self.conversions[key][old_name] = new_name
+                if bucket is None:
+                    bucket = self.conversions.setdefault(key, {})
+                bucket[old_name] = new_name
         
         return self.conversions
     
     def to_json(self, filepath: str):
         """Save to JSON file."""
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(self.conversions, f, indent=2, ensure_ascii=False)
+        write_json(filepath, self.conversions)
+
 
+def _parse_xlsx_file(job: Tuple[str, str, str]) -> Tuple[str, Any, List[str]]:
+    """Parse one workbook and write its JSON; runs in a worker process.
+    
+    job is (kind, filepath, output_path). Returns (kind, nodes, root_nodes),
+    where nodes is a name -> dict map for tree files and the SNP count for
+    the SNP Index.
+    """
+    kind, filepath, output_path = job
+    if kind == 'snp':
+        parser = XLSXSNPIndexParser(filepath)
+        snps = parser.parse()
+        parser.to_json(output_path)
+        return kind, len(snps), []
+    
+    parser = XLSXTreeParser(filepath)
+    nodes = parser.parse()
+    parser.to_json(output_path)
+    return kind, nodes, parser.root_nodes
 
-def process_year_xlsx(base_dir: str, year: str, output_dir: str):
+
+def process_year_xlsx(base_dir: str, year: str, output_dir: str,
+                      max_workers: Optional[int] = None):
     """Process all XLSX files for a given year."""
     
     # Map year to directory name
@@ -503,15 +614,11 @@ def process_year_xlsx(base_dir: str, year: str, output_dir: str):
     year_output = os.path.join(output_dir, year)
     os.makedirs(year_output, exist_ok=True)
     
-    # Haplogroup pattern for tree files
-    hg_pattern = re.compile(r'(Haplogroup|2019-2020 Haplogroup|2019Haplogroup)\s*([A-T])\s*(Tree)?\.xlsx', re.IGNORECASE)
-    trunk_pattern = re.compile(r'(Tree\s*Trunk|TreeTrunk|2019TreeTrunk)\.xlsx', re.IGNORECASE)
-    snp_pattern = re.compile(r'SNP\s*Index', re.IGNORECASE)
-    
-    all_nodes = {}
-    all_root_nodes = []
+    hg_output = os.path.join(year_output, 'individual_haplogroups')
     
-    # Process each file
+    # Classify files up front; each workbook is an independent parse
+    jobs = []
+    labels = []
     for filename in sorted(os.listdir(year_dir)):
         if not filename.endswith('.xlsx'):
             continue
@@ -519,50 +626,51 @@ def process_year_xlsx(base_dir: str, year: str, output_dir: str):
         filepath = os.path.join(year_dir, filename)
         
         # Check file type
-        hg_match = hg_pattern.search(filename)
-        trunk_match = trunk_pattern.search(filename)
-        snp_match = snp_pattern.search(filename)
+        hg_match = _HG_FILE_RE.search(filename)
         
         if hg_match:
             # Haplogroup tree file
             letter = hg_match.group(2).upper()
-            print(f"  Processing Haplogroup {letter}: {filename}")
-            
-            parser = XLSXTreeParser(filepath)
-            nodes = parser.parse()
-            
-            # Save individual haplogroup
-            hg_output = os.path.join(year_output, 'individual_haplogroups')
             os.makedirs(hg_output, exist_ok=True)
-            parser.to_json(os.path.join(hg_output, f'haplogroup_{letter}.json'))
-            
-            # Merge into combined
-            all_nodes.update(nodes)
-            all_root_nodes.extend(parser.root_nodes)
+            jobs.append(('haplogroup', filepath, os.path.join(hg_output, f'haplogroup_{letter}.json')))
+            labels.append(f"Haplogroup {letter}: {filename}")
             
-        elif trunk_match:
-            print(f"  Processing Tree Trunk: {filename}")
-            parser = XLSXTreeParser(filepath)
-            nodes = parser.parse()
-            parser.to_json(os.path.join(year_output, 'tree_trunk.json'))
+        elif _TRUNK_FILE_RE.search(filename):
+            jobs.append(('trunk', filepath, os.path.join(year_output, 'tree_trunk.json')))
+            labels.append(f"Tree Trunk: {filename}")
             
-        elif snp_match:
-            print(f"  Processing SNP Index: {filename}")
-            parser = XLSXSNPIndexParser(filepath)
-            snps = parser.parse()
-            parser.to_json(os.path.join(year_output, 'snp_index.json'))
-            print(f"    Parsed {len(snps)} SNPs")
+        elif _SNP_FILE_RE.search(filename):
+            jobs.append(('snp', filepath, os.path.join(year_output, 'snp_index.json')))
+            labels.append(f"SNP Index: {filename}")
+    
+    all_nodes = {}
+    all_root_nodes: Dict[str, None] = {}  # ordered set: first-seen order, deduplicated
+    
+    # openpyxl parsing is CPU-bound Python, so workbooks are parsed in
+    # worker processes; results are merged in file order
+    executor = ProcessPoolExecutor(max_workers=max_workers) if len(jobs) > 1 else None
+    try:
+        results = executor.map(_parse_xlsx_file, jobs) if executor else map(_parse_xlsx_file, jobs)
+        for label, (kind, nodes, root_nodes) in zip(labels, results):
+            print(f"  Processing {label}")
+            if kind == 'haplogroup':
+                # Merge into combined
+                all_nodes.update(nodes)
+                all_root_nodes.update(dict.fromkeys(root_nodes))
+            elif kind == 'snp':
+                print(f"    Parsed {nodes} SNPs")
+    finally:
+        if executor:
+            executor.shutdown()
     
     # Save merged tree
     if all_nodes:
         merged = {
             'year': year,
-            'nodes': {name: node.to_dict() if isinstance(node, HaplogroupNode) else node 
-                      for name, node in all_nodes.items()},
-            'root_nodes': list(set(all_root_nodes))
+            'nodes': all_nodes,
+            'root_nodes': list(all_root_nodes)
         }
-        with open(os.path.join(year_output, 'tree.json'), 'w', encoding='utf-8') as f:
-            json.dump(merged, f, indent=2, ensure_ascii=False)
+        write_json(os.path.join(year_output, 'tree.json'), merged)
         print(f"  Merged tree: {len(all_nodes)} nodes")
 
 
@@ -581,6 +689,8 @@ def main():
                         choices=['2018', '2019-2020', '2018-china', '2019-2020-china', 'all'],
                         default='all',
                         help='Year to process')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker processes for parsing workbooks (default: CPU count)')
     
     args = parser.parse_args()
     
@@ -590,7 +700,7 @@ def main():
     
     for year in years_to_process:
         print(f"\nProcessing {year}...")
-        process_year_xlsx(args.input_dir, year, args.output_dir)
+        process_year_xlsx(args.input_dir, year, args.output_dir, args.workers)
     
     print("\nDone!")
 
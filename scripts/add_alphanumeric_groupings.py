@@ -2,6 +2,7 @@
 """
 Add alphanumeric groupings to JSON trees.
 Groups haplogroups by name length (2, 3, 4, 5, 6+ characters).
+The groups are written to YEAR/tree_groups.json beside each tree.json.
 
 Example: For E1b1b1a1c1 (E-M44):
   - 2-char: E, E1
@@ -11,18 +12,62 @@ Example: For E1b1b1a1c1 (E-M44):
   - 6-char: E1b1b1
 """
 
+import functools
 import json
 import re
 from pathlib import Path
 from collections import defaultdict
 
+try:
+    import orjson
+except ImportError:  # fall back to the stdlib encoder
+    orjson = None
 
+
+_TILDE_TABLE = str.maketrans('', '', '~')
+_PAREN_RE = re.compile(r'\([^)]+\)')
+
+
+@functools.lru_cache(maxsize=65536)
 def extract_alphanumeric_name(haplo_name):
     """Extract alphanumeric part, removing tildes and parenthetical notes."""
-    # Remove ~ and anything in parentheses
-    clean = re.sub(r'[~]', '', haplo_name)
-    clean = re.sub(r'\([^)]+\)', '', clean).strip()
-    return clean
+    # Remove ~, then anything in parentheses
+    return _PAREN_RE.sub('', haplo_name.translate(_TILDE_TABLE)).strip()
+
+
+def _dumps(obj):
+    """Encode obj as 2-space indented UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
+
+
+def write_grouped_json(path, data):
+    """Write the groups file one section at a time.
+    
+    The output is identical to json.dump(data, f, indent=2, ensure_ascii=False),
+    but only one top-level value (or one length group) is encoded at a time.
+    JSON strings cannot contain raw newlines, so re-indenting encoded bytes
+    is safe.
+    """
+    with open(path, 'wb') as f:
+        sep = b'{\n  '
+        for key, value in data.items():
+            f.write(sep + _dumps(key) + b': ')
+            if key == 'alphanumeric_groups' and value:
+                inner = b'{\n    '
+                for group_key, group in value.items():
+                    f.write(inner + _dumps(group_key) + b': '
+                            + _dumps(group).replace(b'\n', b'\n    '))
+                    inner = b',\n    '
+                f.write(b'\n  }')
+            else:
+                f.write(_dumps(value).replace(b'\n', b'\n  '))
+            sep = b',\n  '
+        f.write(b'\n}' if data else b'{}')
+
+
+_LENGTH_KEYS = {1: '1-char', 2: '2-char', 3: '3-char', 4: '4-char', 5: '5-char', 6: '6-char'}
 
 
 def group_by_length(haplogroups):
@@ -38,61 +83,17 @@ def group_by_length(haplogroups):
         '7plus-char': defaultdict(list)
     }
     
-    for haplo_name, haplo_data in haplogroups.items():
+    # Entries reference nodes by name; the node data itself stays in 'nodes'
+    for haplo_name in haplogroups:
         clean_name = extract_alphanumeric_name(haplo_name)
         
-        # Determine length category
+        # Determine length category; the prefix is the whole name up to 7 chars
         length = len(clean_name)
-        
-        if length == 1:
-            prefix = clean_name[0]
-            groups['1-char'][prefix].append({
-                'name': haplo_name,
-                'clean_name': clean_name,
-                'data': haplo_data
-            })
-        elif length == 2:
-            prefix = clean_name[:2]
-            groups['2-char'][prefix].append({
-                'name': haplo_name,
-                'clean_name': clean_name,
-                'data': haplo_data
-            })
-        elif length == 3:
-            prefix = clean_name[:3]
-            groups['3-char'][prefix].append({
-                'name': haplo_name,
-                'clean_name': clean_name,
-                'data': haplo_data
-            })
-        elif length == 4:
-            prefix = clean_name[:4]
-            groups['4-char'][prefix].append({
-                'name': haplo_name,
-                'clean_name': clean_name,
-                'data': haplo_data
-            })
-        elif length == 5:
-            prefix = clean_name[:5]
-            groups['5-char'][prefix].append({
-                'name': haplo_name,
-                'clean_name': clean_name,
-                'data': haplo_data
-            })
-        elif length == 6:
-            prefix = clean_name[:6]
-            groups['6-char'][prefix].append({
-                'name': haplo_name,
-                'clean_name': clean_name,
-                'data': haplo_data
-            })
-        else:  # 7+
-            prefix = clean_name[:7]
-            groups['7plus-char'][prefix].append({
-                'name': haplo_name,
-                'clean_name': clean_name,
-                'data': haplo_data
-            })
+        key = _LENGTH_KEYS.get(length, '7plus-char')
+        groups[key][clean_name[:7]].append({
+            'name': haplo_name,
+            'clean_name': clean_name,
+        })
     
     # Convert defaultdicts to regular dicts and sort
     result = {}
@@ -104,7 +105,11 @@ def group_by_length(haplogroups):
 
 
 def process_year_tree(tree_file):
-    """Process a year's tree and add groupings."""
+    """Build the groupings for a year's tree.
+    
+    Returns {'alphanumeric_groups', 'grouping_stats'} for the tree_groups.json
+    sidecar (entries reference nodes by name), or None for an empty tree.
+    """
     
     with open(tree_file, 'r', encoding='utf-8') as f:
         data = json.load(f)
@@ -117,13 +122,19 @@ def process_year_tree(tree_file):
     # Group by length
     groups = group_by_length(nodes)
     
-    # Add groupings to data
-    data['alphanumeric_groups'] = groups
-    
     # Calculate stats
     stats = {key: len(group) for key, group in groups.items()}
-    data['grouping_stats'] = stats
     
+    return {'alphanumeric_groups': groups, 'grouping_stats': stats}
+
+
+def load_grouped_tree(year_dir):
+    """Load a year's tree.json with its tree_groups.json sidecar merged in."""
+    year_dir = Path(year_dir)
+    with open(year_dir / 'tree.json', 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    with open(year_dir / 'tree_groups.json', 'r', encoding='utf-8') as f:
+        data.update(json.load(f))
     return data
 
 
@@ -152,10 +163,8 @@ def main():
             updated_data = process_year_tree(tree_file)
             
             if updated_data:
-                # Save updated file
-                grouped_file = year_dir / 'tree_grouped.json'
-                with open(grouped_file, 'w', encoding='utf-8') as f:
-                    json.dump(updated_data, f, indent=2, ensure_ascii=False)
+                # Save groups next to the tree; the tree itself is not rewritten
+                write_grouped_json(year_dir / 'tree_groups.json', updated_data)
                 
                 stats = updated_data['grouping_stats']
                 print(f"  Groups: 1-char={stats['1-char']}, 2-char={stats['2-char']}, "
@@ -172,12 +181,11 @@ def main():
     # Show example
     if processed:
         example_year = processed[-1]
-        example_file = output_dir / example_year / 'tree_grouped.json'
-        with open(example_file, 'r') as f:
-            example = json.load(f)
+        example = load_grouped_tree(output_dir / example_year)
         
         print(f"\nExample from {example_year}:")
         groups = example['alphanumeric_groups']
+        nodes = example['nodes']
         
         # Show some 3-char groups
         if '3-char' in groups:
@@ -186,7 +194,7 @@ def main():
                 items = groups['3-char'][prefix]
                 print(f"  {prefix}: {len(items)} haplogroups")
                 for item in items[:3]:
-                    snps = item['data'].get('snps', [])
+                    snps = nodes[item['name']].get('snps', [])
                     snp_str = snps[0] if snps else 'no SNPs'
                     print(f"    - {item['name']} ({snp_str})")
 
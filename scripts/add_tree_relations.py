@@ -8,31 +8,53 @@ Adds:
 - normative_names: Array of nomenclature variations like E-M44, E1-M44, E1a-M44, E1a1-M44
 """
 
+import functools
 import json
+import mmap
+import os
 import re
 from pathlib import Path
-from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
+try:
+    import orjson
+except ImportError:  # fall back to the stdlib encoder
+    orjson = None
 
-def get_haplogroup_prefix_levels(haplogroup: str) -> list[str]:
+
+# Output is written through one large buffer so records flush in 64 KiB chunks
+_WRITE_BUFFER_SIZE = 1 << 16
+
+
+if orjson is not None:
+    _loads = orjson.loads
+    
+    def _dump_line(entry: dict) -> bytes:
+        """Encode one JSONL record (compact, UTF-8, newline-terminated)."""
+        return orjson.dumps(entry) + b'\n'
+else:
+    _loads = json.loads
+    
+    def _dump_line(entry: dict) -> bytes:
+        """Encode one JSONL record (UTF-8, newline-terminated)."""
+        return (json.dumps(entry, ensure_ascii=False) + '\n').encode('utf-8')
+
+
+@functools.lru_cache(maxsize=None)
+def get_haplogroup_prefix_levels(haplogroup: str) -> tuple[str, ...]:
     """
     Extract all prefix levels from a haplogroup name.
-    E.g., "E1a1" -> ["E", "E1", "E1a", "E1a1"]
+    E.g., "E1a1" -> ("E", "E1", "E1a", "E1a1")
+    
+    Many SNPs share a haplogroup, so results are memoized (hence a tuple).
     """
     if not haplogroup:
-        return []
+        return ()
     
     # Remove trailing ~ or other markers for processing
     clean_haplo = haplogroup.rstrip('~')
     
-    prefixes = []
-    current = ""
-    
-    for char in clean_haplo:
-        current += char
-        prefixes.append(current)
-    
-    return prefixes
+    return tuple(clean_haplo[:i] for i in range(1, len(clean_haplo) + 1))
 
 
 def generate_normative_names(snp_name: str, haplogroup: str) -> list[str]:
@@ -47,18 +69,33 @@ def generate_normative_names(snp_name: str, haplogroup: str) -> list[str]:
     if not haplogroup or not snp_name:
         return []
     
-    # Clean up haplogroup name
-    clean_haplo = haplogroup.rstrip('~')
-    
-    # Get all prefix levels
-    prefixes = get_haplogroup_prefix_levels(clean_haplo)
-    
-    # Generate names for each prefix level
-    normative_names = []
-    for prefix in prefixes:
-        normative_names.append(f"{prefix}-{snp_name}")
-    
-    return normative_names
+    # One name per prefix level; the ~ is stripped by the (cached) prefix helper
+    suffix = '-' + snp_name
+    return [prefix + suffix for prefix in get_haplogroup_prefix_levels(haplogroup)]
+
+
+def _load_json_file(path: Path):
+    """Read and decode one JSON file; returns the error instead of raising."""
+    try:
+        return _loads(path.read_bytes())
+    except Exception as e:
+        return e
+
+
+def _iter_lines(path: Path):
+    """Yield the lines of a file as bytes (without newlines) from a read-only mmap."""
+    with open(path, 'rb') as f:
+        if not f.seek(0, 2):
+            return  # mmap cannot map an empty file
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start = 0
+            end = len(mm)
+            while start < end:
+                nl = mm.find(b'\n', start)
+                if nl < 0:
+                    nl = end
+                yield mm[start:nl]
+                start = nl + 1
 
 
 def build_haplogroup_tree() -> tuple[dict, dict]:
@@ -67,32 +104,36 @@ def build_haplogroup_tree() -> tuple[dict, dict]:
     Returns (parent_map, children_map)
     """
     parent_map = {}  # haplogroup -> parent_name
-    children_map = defaultdict(list)  # haplogroup -> [children]
+    children_map = {}  # haplogroup -> [children]
     
     haplogroup_dir = Path('output_master/2019-2020/individual_haplogroups')
-    
-    for json_file in haplogroup_dir.glob('haplogroup_*.json'):
-        try:
-            with open(json_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            nodes = data.get('nodes', {})
+    json_files = list(haplogroup_dir.glob('haplogroup_*.json'))
+    
+    # Reads and decodes overlap in threads; merging stays here, in file order
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        for json_file, data in zip(json_files, executor.map(_load_json_file, json_files)):
+            if isinstance(data, Exception):
+                print(f"Warning: Error processing {json_file}: {data}")
+                continue
             
-            for name, node in nodes.items():
-                if isinstance(node, dict):
-                    parent_id = node.get('parent_id')
-                    children = node.get('children', [])
-                    
-                    if parent_id:
-                        parent_map[name] = parent_id
-                    
-                    if children:
-                        children_map[name] = children
+            try:
+                nodes = data.get('nodes', {})
+                
+                for name, node in nodes.items():
+                    if isinstance(node, dict):
+                        parent_id = node.get('parent_id')
+                        children = node.get('children', [])
+                        
+                        if parent_id:
+                            parent_map[name] = parent_id
                         
-        except Exception as e:
-            print(f"Warning: Error processing {json_file}: {e}")
+                        if children:
+                            children_map[name] = children
+                            
+            except Exception as e:
+                print(f"Warning: Error processing {json_file}: {e}")
     
-    return parent_map, dict(children_map)
+    return parent_map, children_map
 
 
 def main():
@@ -110,12 +151,11 @@ def main():
     normative_count = 0
     total_count = 0
     
-    with open(input_path, 'r', encoding='utf-8') as infile, \
-         open(output_path, 'w', encoding='utf-8') as outfile:
+    with open(output_path, 'wb', buffering=_WRITE_BUFFER_SIZE) as outfile:
         
-        for line in infile:
+        for line in _iter_lines(input_path):
             total_count += 1
-            entry = json.loads(line.strip())
+            entry = _loads(line)
             
             snp_name = entry.get('snp_name', '')
             haplogroup = entry.get('haplogroup', '')
@@ -125,8 +165,8 @@ def main():
                 parent = parent_map.get(haplogroup)
                 entry['parent_name'] = parent  # Will be None if not found
                 
-                # Add child_haplogroups
-                children = children_map.get(haplogroup, [])
+                # Add child_haplogroups (the shared () encodes as [] too)
+                children = children_map.get(haplogroup, ())
                 entry['child_haplogroups'] = children
                 
                 if parent or children:
@@ -141,22 +181,21 @@ def main():
             if normative_names:
                 normative_count += 1
             
-            outfile.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            outfile.write(_dump_line(entry))
     
     print(f"\nProcessed {total_count} SNPs")
     print(f"Added tree relations to {updated_count} SNPs")
     print(f"Added normative names to {normative_count} SNPs")
     
-    # Replace original file
-    import shutil
-    shutil.move(output_path, input_path)
+    # Replace original file (atomic rename within output_master/)
+    os.replace(output_path, input_path)
     print(f"\nUpdated {input_path}")
     
     # Show sample entries
     print("\n=== Sample entries ===")
-    with open(input_path, 'r', encoding='utf-8') as f:
+    with open(input_path, 'rb') as f:
         for line in f:
-            entry = json.loads(line)
+            entry = _loads(line)
             if entry.get('snp_name') in ['M44', 'M132', 'M33', 'M253']:
                 print(f"\n{entry['snp_name']}:")
                 print(f"  haplogroup: {entry.get('haplogroup')}")
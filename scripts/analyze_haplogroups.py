@@ -18,24 +18,31 @@ examples = {
     'brackets': [],
 }
 
-with open('output_master/unified_snp_table.tsv', 'r') as f:
-    reader = csv.DictReader(f, delimiter='\t')
+with open('output_master/unified_snp_table.tsv', 'r', newline='') as f:
+    reader = csv.reader(f, delimiter='\t')
+    header = next(reader)
+    snp_idx = header.index('snp_name')
+    haplo_idx = header.index('haplogroup')
     for row in reader:
-        haplo = row['haplogroup']
+        # Match DictReader: skip blank lines, read missing columns as None
+        if not row:
+            continue
+        if len(row) < len(header):
+            row += [None] * (len(header) - len(row))
+        haplo = row[haplo_idx]
+        # First matching marker wins, in the same order as the buckets above
         if '~' in haplo:
-            stats['tilde'] += 1
-            if len(examples['tilde']) < 5:
-                examples['tilde'].append(f"{row['snp_name']}: {haplo}")
+            key = 'tilde'
         elif '^' in haplo:
-            stats['caret'] += 1
-            if len(examples['caret']) < 5:
-                examples['caret'].append(f"{row['snp_name']}: {haplo}")
+            key = 'caret'
         elif '(' in haplo:
-            stats['brackets'] += 1
-            if len(examples['brackets']) < 5:
-                examples['brackets'].append(f"{row['snp_name']}: {haplo}")
+            key = 'brackets'
         else:
             stats['clean'] += 1
+            continue
+        stats[key] += 1
+        if len(examples[key]) < 5:
+            examples[key].append(f"{row[snp_idx]}: {haplo}")
 
 print("Haplogroup format statistics:")
 print("=" * 50)
@@ -52,16 +52,16 @@ def extract_haplogroup_names_by_year():
 def build_evolution_table(years_data):
     """Build evolution table showing name changes."""
     
+    years = sorted(years_data)
+    
     # Track SNP to haplogroup mappings per year
     snp_to_haplo = {}
     
-    for year, haplogroups in sorted(years_data.items()):
-        snp_to_haplo[year] = {}
-        for haplo_name, info in haplogroups.items():
+    for year in years:
+        year_map = snp_to_haplo[year] = defaultdict(list)
+        for haplo_name, info in years_data[year].items():
             for snp in info['snps']:
-                if snp not in snp_to_haplo[year]:
-                    snp_to_haplo[year][snp] = []
-                snp_to_haplo[year][snp].append(haplo_name)
+                year_map[snp].append(haplo_name)
     
     # Find all unique SNPs across all years
     all_snps = set()
@@ -70,17 +70,18 @@ def build_evolution_table(years_data):
     
     # Build evolution records
     evolution = []
+    year_maps = [(year, snp_to_haplo[year]) for year in years]
     
     for snp in sorted(all_snps):
         record = {'snp': snp}
         
         # Track which haplogroup this SNP was in for each year
-        for year in sorted(years_data.keys()):
-            if snp in snp_to_haplo[year]:
-                haplos = snp_to_haplo[year][snp]
-                record[year] = haplos if len(haplos) > 1 else haplos[0]
-            else:
+        for year, year_map in year_maps:
+            haplos = year_map.get(snp)
+            if haplos is None:
                 record[year] = None
+            else:
+                record[year] = haplos if len(haplos) > 1 else haplos[0]
         
         evolution.append(record)
     
@@ -93,22 +94,21 @@ def find_haplogroup_renames(years_data):
     years = sorted(years_data.keys())
     renames = []
     
-    for i in range(len(years) - 1):
-        year1, year2 = years[i], years[i + 1]
-        
-        # Build SNP signature to haplogroup mapping
-        sig_to_haplo_1 = {}
-        sig_to_haplo_2 = {}
-        
-        for haplo, info in years_data[year1].items():
+    # SNP signature -> haplogroup, built once per year (middle years are
+    # compared on both sides)
+    sig_to_haplo = {}
+    for year in years:
+        sigs = {}
+        for haplo, info in years_data[year].items():
             sig = tuple(sorted(info['snps']))
             if sig:
-                sig_to_haplo_1[sig] = haplo
-        
-        for haplo, info in years_data[year2].items():
-            sig = tuple(sorted(info['snps']))
-            if sig:
-                sig_to_haplo_2[sig] = haplo
+                sigs[sig] = haplo
+        sig_to_haplo[year] = sigs
+    
+    for i in range(len(years) - 1):
+        year1, year2 = years[i], years[i + 1]
+        sig_to_haplo_1 = sig_to_haplo[year1]
+        sig_to_haplo_2 = sig_to_haplo[year2]
         
         # Find matching signatures with different names
         for sig in sig_to_haplo_1:
@@ -128,6 +128,15 @@ def find_haplogroup_renames(years_data):
     return renames
 
 
+def _tsv_cell(val):
+    """Format one year's haplogroup(s) for the evolution TSV."""
+    if val is None:
+        return ''
+    if isinstance(val, list):
+        return ', '.join(val)
+    return val
+
+
 def main():
     """Build naming evolution table."""
     
@@ -165,26 +174,21 @@ def main():
     # Evolution TSV
     with open(output_dir / 'haplogroup_evolution.tsv', 'w') as f:
         f.write('snp\t' + '\t'.join(years) + '\n')
-        for record in evolution:
-            row = [record['snp']]
-            for year in years:
-                val = record.get(year)
-                if val is None:
-                    row.append('')
-                elif isinstance(val, list):
-                    row.append(', '.join(val))
-                else:
-                    row.append(val)
-            f.write('\t'.join(row) + '\n')
+        f.writelines(
+            '\t'.join([record['snp'], *(_tsv_cell(record.get(year)) for year in years)]) + '\n'
+            for record in evolution
+        )
     print(f"✓ Saved evolution TSV")
     
     # Renames TSV
     with open(output_dir / 'haplogroup_renames.tsv', 'w') as f:
         f.write('from_year\tto_year\told_name\tnew_name\tdefining_snps\n')
-        for rename in renames:
-            f.write(f"{rename['from_year']}\t{rename['to_year']}\t"
-                   f"{rename['old_name']}\t{rename['new_name']}\t"
-                   f"{', '.join(rename['defining_snps'])}\n")
+        f.writelines(
+            f"{rename['from_year']}\t{rename['to_year']}\t"
+            f"{rename['old_name']}\t{rename['new_name']}\t"
+            f"{', '.join(rename['defining_snps'])}\n"
+            for rename in renames
+        )
     print(f"✓ Saved renames TSV")
     
     print("\n" + "="*60)
@@ -3,20 +3,40 @@
 
 import csv
 
-# Load all Build 37 and Build 38 positions from current SNPs
+# Load all Build 37 and Build 38 positions from current SNPs, keeping the
+# legacy liftOver positions from the same pass for matching afterwards
 current_b37 = {}
 current_b38 = {}
+legacy_lifts = []
 
 with open('output_master/unified_snp_table.tsv', 'r') as f:
-    reader = csv.DictReader(f, delimiter='\t')
+    reader = csv.reader(f, delimiter='\t')
+    header = next(reader)
+    name_idx = header.index('snp_name')
+    haplo_idx = header.index('haplogroup')
+    status_idx = header.index('status')
+    b37_idx = header.index('build37_position')
+    b38_idx = header.index('build38_position')
+    lift37_idx = header.index('build37_liftover')
+    lift38_idx = header.index('build38_liftover')
     for row in reader:
-        if row['status'] != 'legacy':
-            if row['build37_position']:
-                pos = int(row['build37_position'])
-                current_b37[pos] = row['snp_name']
-            if row['build38_position']:
-                pos = int(row['build38_position'])
-                current_b38[pos] = row['snp_name']
+        # Match DictReader: skip blank lines, read missing columns as None
+        if not row:
+            continue
+        if len(row) < len(header):
+            row += [None] * (len(header) - len(row))
+        if row[status_idx] != 'legacy':
+            if row[b37_idx]:
+                current_b37[int(row[b37_idx])] = row[name_idx]
+            if row[b38_idx]:
+                current_b38[int(row[b38_idx])] = row[name_idx]
+        elif row[lift37_idx] or row[lift38_idx]:
+            legacy_lifts.append((
+                row[name_idx],
+                row[haplo_idx],
+                int(row[lift37_idx]) if row[lift37_idx] else None,
+                int(row[lift38_idx]) if row[lift38_idx] else None,
+            ))
 
 print(f"Loaded {len(current_b37)} current Build 37 positions")
 print(f"Loaded {len(current_b38)} current Build 38 positions")
@@ -25,28 +45,21 @@ print(f"Loaded {len(current_b38)} current Build 38 positions")
 matches_b37 = []
 matches_b38 = []
 
-with open('output_master/unified_snp_table.tsv', 'r') as f:
-    reader = csv.DictReader(f, delimiter='\t')
-    for row in reader:
-        if row['status'] == 'legacy':
-            if row['build37_liftover']:
-                lifted_pos = int(row['build37_liftover'])
-                if lifted_pos in current_b37:
-                    matches_b37.append({
-                        'legacy_name': row['snp_name'],
-                        'legacy_haplo': row['haplogroup'],
-                        'lifted_pos': lifted_pos,
-                        'current_name': current_b37[lifted_pos],
-                    })
-            if row['build38_liftover']:
-                lifted_pos = int(row['build38_liftover'])
-                if lifted_pos in current_b38:
-                    matches_b38.append({
-                        'legacy_name': row['snp_name'],
-                        'legacy_haplo': row['haplogroup'],
-                        'lifted_pos': lifted_pos,
-                        'current_name': current_b38[lifted_pos],
-                    })
+for legacy_name, legacy_haplo, lift37, lift38 in legacy_lifts:
+    if lift37 is not None and lift37 in current_b37:
+        matches_b37.append({
+            'legacy_name': legacy_name,
+            'legacy_haplo': legacy_haplo,
+            'lifted_pos': lift37,
+            'current_name': current_b37[lift37],
+        })
+    if lift38 is not None and lift38 in current_b38:
+        matches_b38.append({
+            'legacy_name': legacy_name,
+            'legacy_haplo': legacy_haplo,
+            'lifted_pos': lift38,
+            'current_name': current_b38[lift38],
+        })
 
 print(f"\nLegacy SNPs with liftOver Build 37 matching current SNPs: {len(matches_b37)}")
 print(f"Legacy SNPs with liftOver Build 38 matching current SNPs: {len(matches_b38)}")
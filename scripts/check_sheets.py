@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 import openpyxl
 
-wb = openpyxl.load_workbook('Haplogroup Data 2019-2020-~/2019-2020 Haplogroup E Tree.xlsx', data_only=True)
+wb = openpyxl.load_workbook('Haplogroup Data 2019-2020-~/2019-2020 Haplogroup E Tree.xlsx',
+                            read_only=True, data_only=True)
 
 print(f"Total sheets: {len(wb.sheetnames)}")
 print(f"Sheet names: {wb.sheetnames}")
@@ -12,13 +13,14 @@ for sheet_name in wb.sheetnames:
     ws = wb[sheet_name]
     print(f"  Rows: {ws.max_row}, Cols: {ws.max_column}")
     
-    # Look for "Name" header
-    for row_idx in range(1, min(100, ws.max_row + 1)):
-        first_val = ws.cell(row=row_idx, column=1).value
+    # Look for "Name" header (rows stream; only the first 99 are read)
+    for row_idx, row in enumerate(ws.iter_rows(max_row=99, max_col=9, values_only=True), 1):
+        first_val = row[0] if row else None
         if first_val and str(first_val).strip().lower() == 'name':
             print(f"\n  Found 'Name' header at row {row_idx}!")
-            for col_idx in range(1, 10):
-                val = ws.cell(row=row_idx, column=col_idx).value
+            for col_idx, val in enumerate(row, 1):
                 if val:
                     print(f"    C{col_idx}: {val}")
             break
+
+wb.close()
@@ -1,25 +1,30 @@
 #!/usr/bin/env python3
 import openpyxl
 
-wb = openpyxl.load_workbook('Haplogroup Data 2019-2020-~/2019-2020 Haplogroup E Tree.xlsx', data_only=True)
+wb = openpyxl.load_workbook('Haplogroup Data 2019-2020-~/2019-2020 Haplogroup E Tree.xlsx',
+                            read_only=True, data_only=True)
 ws = wb['Sheet1']
 
+# One streamed pass over rows 1327-1884, keeping only the rows shown below
+rows = {}
+for row_idx, row in enumerate(ws.iter_rows(min_row=1327, max_row=1884, max_col=19, values_only=True), 1327):
+    if row_idx in (1327, 1328, 1884):
+        rows[row_idx] = row
+wb.close()
+
 print("Row 1327 (header row):")
-for col_idx in range(1, 20):
-    val = ws.cell(row=1327, column=col_idx).value
+for col_idx, val in enumerate(rows.get(1327, ()), 1):
     if val:
         print(f"  C{col_idx}: {val}")
 
 print("\nRow 1328 (first data row):")
-for col_idx in range(1, 20):
-    val = ws.cell(row=1328, column=col_idx).value
+for col_idx, val in enumerate(rows.get(1328, ()), 1):
     if val:
         val_str = str(val)[:100]  # Limit length
         print(f"  C{col_idx}: {val_str}")
 
 print("\nRow 1884 (M44 row):")
-for col_idx in range(1, 20):
-    val = ws.cell(row=1884, column=col_idx).value
+for col_idx, val in enumerate(rows.get(1884, ()), 1):
     if val:
         val_str = str(val)[:200]  # Limit length
         print(f"  C{col_idx}: {val_str}")
@@ -4,6 +4,10 @@
 import openpyxl
 import json
 
+_HAPLOGROUP_LETTERS = frozenset('ABCDEFGHIJKLMNOPQRST')
+# K and P sheets also contain their downstream haplogroups
+_KT_LETTERS = frozenset('KLMNOPQRST')
+
 def compare_haplogroup(letter):
     """Compare a specific haplogroup between main and China versions."""
     
@@ -11,8 +15,8 @@ def compare_haplogroup(letter):
     china_path = f'ISOGG_dna-differences_and_other_info/Y-DNA Haplogroup Tree 2019-2020 (for China users)/2019Haplogroup{letter}.xlsx'
     
     try:
-        main_wb = openpyxl.load_workbook(main_path)
-        china_wb = openpyxl.load_workbook(china_path)
+        main_wb = openpyxl.load_workbook(main_path, read_only=True)
+        china_wb = openpyxl.load_workbook(china_path, read_only=True)
     except Exception as e:
         print(f"Could not load {letter}: {e}")
         return None
@@ -21,25 +25,29 @@ def compare_haplogroup(letter):
     china_ws = china_wb.active
     
     print(f"\n=== Haplogroup {letter} ===")
-    print(f"Main:  {main_ws.dimensions}")
-    print(f"China: {china_ws.dimensions}")
+    print(f"Main:  {main_ws.calculate_dimension(force=True)}")
+    print(f"China: {china_ws.calculate_dimension(force=True)}")
+    
+    # Leading letters that count as this haplogroup, resolved once per sheet pair
+    allowed = frozenset(letter) | (_KT_LETTERS if letter in 'KP' else frozenset())
+    allowed &= _HAPLOGROUP_LETTERS
     
     # Extract haplogroup names from both
     def extract_haplogroups(ws, max_rows=5000):
         hgs = set()
-        for row in range(1, min(max_rows, ws.max_row + 1)):
-            for col in range(1, 10):
-                val = ws.cell(row=row, column=col).value
+        for row in ws.iter_rows(max_row=max_rows - 1, max_col=9, values_only=True):
+            for val in row:
                 if val and isinstance(val, str):
                     val = val.strip()
                     # Check if looks like haplogroup
-                    if len(val) >= 1 and val[0] in 'ABCDEFGHIJKLMNOPQRST':
-                        if val[0] == letter or (letter in 'KP' and val[0] in 'KLMNOPQRST'):
-                            hgs.add(val)
+                    if val and val[0] in allowed:
+                        hgs.add(val)
         return hgs
     
     main_hgs = extract_haplogroups(main_ws)
     china_hgs = extract_haplogroups(china_ws)
+    main_wb.close()
+    china_wb.close()
     
     only_main = main_hgs - china_hgs
     only_china = china_hgs - main_hgs
@@ -6,6 +6,14 @@ Convert enhanced SNP TSV table to JSON format.
 import csv
 import json
 import sys
+from operator import itemgetter
+
+
+_POSITION_COLUMNS = (
+    'build33_position', 'build34_position', 'build35_position',
+    'build36_position', 'build36_liftover', 'build37_position',
+    'build38_position',
+)
 
 
 def convert_tsv_to_json(tsv_path: str, json_path: str):
@@ -14,27 +22,39 @@ def convert_tsv_to_json(tsv_path: str, json_path: str):
     snps = []
     
     with open(tsv_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f, delimiter='\t')
+        reader = csv.reader(f, delimiter='\t')
+        header = next(reader)
+        col = {name: i for i, name in enumerate(header)}
+        get_positions = itemgetter(*(col[name] for name in _POSITION_COLUMNS))
+        snp_idx = col['snp_name']
+        haplo_idx = col['haplogroup']
+        alpha_idx = col['haplogroup_alpha']
+        alt_idx = col['alternate_names']
+        rs_idx = col['rs_number']
+        mutation_idx = col['mutation']
+        status_idx = col['status']
+        source_idx = col['source']
         
         for row in reader:
+            # Match DictReader: skip blank lines, read missing columns as None
+            if not row:
+                continue
+            if len(row) < len(header):
+                row += [None] * (len(header) - len(row))
+            
             # Convert to proper types
             snp = {
-                'snp_name': row['snp_name'],
-                'haplogroup': row['haplogroup'],
-                'haplogroup_alpha': row['haplogroup_alpha'] or None,
-                'alternate_names': [name.strip() for name in row['alternate_names'].split(';') if name.strip()] if row['alternate_names'] else [],
-                'rs_number': row['rs_number'] or None,
-                'build33_position': int(row['build33_position']) if row['build33_position'] else None,
-                'build34_position': int(row['build34_position']) if row['build34_position'] else None,
-                'build35_position': int(row['build35_position']) if row['build35_position'] else None,
-                'build36_position': int(row['build36_position']) if row['build36_position'] else None,
-                'build36_liftover': int(row['build36_liftover']) if row['build36_liftover'] else None,
-                'build37_position': int(row['build37_position']) if row['build37_position'] else None,
-                'build38_position': int(row['build38_position']) if row['build38_position'] else None,
-                'mutation': row['mutation'] or None,
-                'status': row['status'] or None,
-                'source': row['source']
+                'snp_name': row[snp_idx],
+                'haplogroup': row[haplo_idx],
+                'haplogroup_alpha': row[alpha_idx] or None,
+                'alternate_names': [name.strip() for name in row[alt_idx].split(';') if name.strip()] if row[alt_idx] else [],
+                'rs_number': row[rs_idx] or None,
             }
+            for name, value in zip(_POSITION_COLUMNS, get_positions(row)):
+                snp[name] = int(value) if value else None
+            snp['mutation'] = row[mutation_idx] or None
+            snp['status'] = row[status_idx] or None
+            snp['source'] = row[source_idx]
             snps.append(snp)
     
     # Write JSON
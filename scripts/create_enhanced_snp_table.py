@@ -11,18 +11,29 @@ Create enhanced unified SNP table with:
 import os
 import sys
 import csv
+import functools
 import re
 import subprocess
-import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field
 from typing import Dict, Optional, List, Set
 
+try:
+    from liftover import ChainFile
+except ImportError:  # fall back to the UCSC liftOver binary
+    ChainFile = None
+
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from parser.xlsx_processor import XLSXSNPIndexParser
 from parser.isogg_processor import ISOGGProcessor
 
 
+_STATUS_RE = re.compile(r'\(([^)]+)\)')
+_STATUS_STRIP_RE = re.compile(r'\s*\([^)]+\)\s*')
+_VERSION_SUFFIX_RE = re.compile(r'[._]\d+$')
+
+
 @dataclass
 class EnhancedSNP:
     """Enhanced SNP record with all data."""
@@ -81,10 +92,10 @@ def parse_haplogroup_status(haplo: str) -> tuple:
     Returns: (clean_haplogroup, status)
     """
     # Extract bracket contents
-    match = re.search(r'\(([^)]+)\)', haplo)
+    match = _STATUS_RE.search(haplo)
     if match:
         status = match.group(1)
-        clean = re.sub(r'\s*\([^)]+\)\s*', '', haplo).strip()
+        clean = _STATUS_STRIP_RE.sub('', haplo).strip()
         return clean, status
     
     # Check for tilde suffix (provisional)
@@ -94,10 +105,27 @@ def parse_haplogroup_status(haplo: str) -> tuple:
     return haplo, ''
 
 
+def _lift_in_process(positions: Dict[str, int], chain_file: str) -> Dict[str, int]:
+    """Lift 1-based chrY positions with the in-process chain converter."""
+    converter = ChainFile(chain_file, one_based=True)
+    
+    lifted = {}
+    for snp_name, pos in positions.items():
+        hits = converter['chrY'][pos]
+        # Like the liftOver binary, drop positions that map to more than one place
+        if len(hits) == 1:
+            lifted[snp_name] = hits[0][1]
+    return lifted
+
+
 def run_liftover(positions: Dict[str, int], chain_file: str, base_dir: str) -> Dict[str, int]:
-    """Run liftOver on a set of positions."""
+    """Run liftOver on a set of positions.
+    
+    Uses the in-process ``liftover`` package when installed, otherwise the
+    UCSC liftOver binary in base_dir.
+    """
     liftover_bin = os.path.join(base_dir, 'liftOver')
-    if not os.path.exists(liftover_bin):
+    if ChainFile is None and not os.path.exists(liftover_bin):
         print(f"  Warning: liftOver not found at {liftover_bin}")
         return {}
     
@@ -105,45 +133,32 @@ def run_liftover(positions: Dict[str, int], chain_file: str, base_dir: str) -> D
         print(f"  Warning: Chain file not found: {chain_file}")
         return {}
     
+    if ChainFile is not None:
+        return _lift_in_process(positions, chain_file)
+    
     # Create sanitized mapping for SNP names (BED format doesn't like spaces, brackets, etc.)
     name_mapping = {}
-    sanitized_positions = {}
+    bed_lines = []
     for idx, (snp_name, pos) in enumerate(positions.items()):
         safe_name = f"SNP_{idx}"
         name_mapping[safe_name] = snp_name
-        sanitized_positions[safe_name] = pos
-    
-    # Create temp file and write positions with sanitized names
-    fd, bed_in_path = tempfile.mkstemp(suffix='.bed', text=True)
-    with os.fdopen(fd, 'w') as bed_in:
-        for safe_name, pos in sanitized_positions.items():
-            bed_in.write(f"chrY\t{pos-1}\t{pos}\t{safe_name}\n")
-        bed_in.flush()  # Ensure all data is written
-    
-    bed_out_path = bed_in_path.replace('.bed', '_lifted.bed')
-    unmapped_path = bed_in_path.replace('.bed', '_unmapped.bed')
-    
-    try:
-        result = subprocess.run(
-            [liftover_bin, bed_in_path, chain_file, bed_out_path, unmapped_path],
-            capture_output=True, text=True
-        )
-        
-        lifted = {}
-        if os.path.exists(bed_out_path):
-            with open(bed_out_path) as f:
-                for line in f:
-                    parts = line.strip().split('\t')
-                    if len(parts) >= 4:
-                        safe_name = parts[3]
-                        if safe_name in name_mapping:
-                            original_name = name_mapping[safe_name]
-                            lifted[original_name] = int(parts[2])
-        return lifted
-    finally:
-        for path in [bed_in_path, bed_out_path, unmapped_path]:
-            if os.path.exists(path):
-                os.remove(path)
+        bed_lines.append(f"chrY\t{pos-1}\t{pos}\t{safe_name}\n")
+    
+    # Stream the BED through liftOver's stdin/stdout; unmapped rows are discarded
+    result = subprocess.run(
+        [liftover_bin, '/dev/stdin', chain_file, '/dev/stdout', os.devnull],
+        input=''.join(bed_lines), capture_output=True, text=True
+    )
+    
+    lifted = {}
+    for line in result.stdout.splitlines():
+        parts = line.strip().split('\t')
+        if len(parts) >= 4:
+            safe_name = parts[3]
+            if safe_name in name_mapping:
+                original_name = name_mapping[safe_name]
+                lifted[original_name] = int(parts[2])
+    return lifted
 
 
 def load_2019_2020_snps(base_dir: str) -> Dict[str, EnhancedSNP]:
@@ -225,11 +240,16 @@ def load_2013_build36(base_dir: str) -> Dict[str, dict]:
 
 def normalize_snp_name(name: str) -> str:
     """Normalize SNP name."""
-    return re.sub(r'[._]\d+$', '', name)
+    return _VERSION_SUFFIX_RE.sub('', name)
 
 
-def get_name_variants(name: str) -> list:
-    """Generate name variants for matching."""
+@functools.lru_cache(maxsize=None)
+def get_name_variants(name: str) -> tuple:
+    """Generate name variants for matching.
+    
+    Names are looked up both while indexing and while matching, so results
+    are memoized (hence a tuple).
+    """
     variants = [name]
     normalized = normalize_snp_name(name)
     if normalized != name:
@@ -238,7 +258,7 @@ def get_name_variants(name: str) -> list:
         variants.append(f"IMS-JST{name}")
     if name.startswith('IMS-JST'):
         variants.append(name[7:])
-    return variants
+    return tuple(variants)
 
 
 def merge_build36_data(
@@ -249,19 +269,15 @@ def merge_build36_data(
     """Merge Build 36 data into unified table."""
     
     # Build lookups
-    alt_to_primary = {}
-    normalized_to_primary = {}
+    name_index = {}  # any name variant -> primary name
     rs_to_primary = {}
     b37_to_primary = {}  # For position matching
     b38_to_primary = {}
     
     for name, snp in unified.items():
         for alt in snp.alternate_names:
-            alt_to_primary[alt] = name
             for v in get_name_variants(alt):
-                alt_to_primary[v] = name
-        for v in get_name_variants(name):
-            normalized_to_primary[v] = name
+                name_index[v] = name
         if snp.rs_number:
             rs_to_primary[snp.rs_number] = name
         if snp.build37_position:
@@ -269,6 +285,14 @@ def merge_build36_data(
         if snp.build38_position:
             b38_to_primary[snp.build38_position] = name
     
+    # Later layers win: primary name variants override alternate names, and
+    # exact primary names override both
+    for name in unified:
+        for v in get_name_variants(name):
+            name_index[v] = name
+    for name in unified:
+        name_index[name] = name
+    
     # First pass: direct matching
     matched_by_name = 0
     unmatched = []
@@ -276,14 +300,7 @@ def merge_build36_data(
     for snp_name, b36_info in build36_data.items():
         found = False
         for variant in get_name_variants(snp_name):
-            target = None
-            if variant in unified:
-                target = variant
-            elif variant in normalized_to_primary:
-                target = normalized_to_primary[variant]
-            elif variant in alt_to_primary:
-                target = alt_to_primary[variant]
-            
+            target = name_index.get(variant)
             if target:
                 unified[target].build36_position = b36_info['position']
                 matched_by_name += 1
@@ -311,8 +328,12 @@ def merge_build36_data(
         chain_37 = os.path.join(base_dir, 'hg18ToHg19.over.chain.gz')
         chain_38 = os.path.join(base_dir, 'hg18ToHg38.over.chain.gz')
         
-        lifted_37 = run_liftover(positions_to_lift, chain_37, base_dir)
-        lifted_38 = run_liftover(positions_to_lift, chain_38, base_dir)
+        # The two chains are independent, so lift through both at once
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            future_37 = executor.submit(run_liftover, positions_to_lift, chain_37, base_dir)
+            future_38 = executor.submit(run_liftover, positions_to_lift, chain_38, base_dir)
+            lifted_37 = future_37.result()
+            lifted_38 = future_38.result()
         
         matched_by_pos = 0
         still_unmatched = []
@@ -428,33 +449,39 @@ def liftover_to_older_builds(unified: Dict[str, EnhancedSNP], base_dir: str):
         
         print(f"    → {applied_35} positions lifted to Build 35")
         
-        # Step 2: hg17 (Build 35) -> hg16 (Build 34)
-        if lifted_35:
-            print(f"  Lifting {len(lifted_35)} Build 35 positions to Build 34 (hg16)...")
-            chain_file = os.path.join(base_dir, 'hg17ToHg16.over.chain.gz')
-            lifted_34 = run_liftover(lifted_35, chain_file, base_dir)
-            
-            applied_34 = 0
-            for name, pos in lifted_34.items():
-                if name in unified:
-                    unified[name].build34_position = pos
-                    applied_34 += 1
-            
-            print(f"    → {applied_34} positions lifted to Build 34")
-        
-        # Step 3: hg17 (Build 35) -> hg15 (Build 33)
         if lifted_35:
-            print(f"  Lifting {len(lifted_35)} Build 35 positions to Build 33 (hg15)...")
-            chain_file = os.path.join(base_dir, 'hg17ToHg15.over.chain.gz')
-            lifted_33 = run_liftover(lifted_35, chain_file, base_dir)
-            
-            applied_33 = 0
-            for name, pos in lifted_33.items():
-                if name in unified:
-                    unified[name].build33_position = pos
-                    applied_33 += 1
-            
-            print(f"    → {applied_33} positions lifted to Build 33")
+            # Steps 2 and 3 both start from Build 35, so lift them concurrently
+            with ProcessPoolExecutor(max_workers=2) as executor:
+                future_34 = executor.submit(
+                    run_liftover, lifted_35, os.path.join(base_dir, 'hg17ToHg16.over.chain.gz'), base_dir
+                )
+                future_33 = executor.submit(
+                    run_liftover, lifted_35, os.path.join(base_dir, 'hg17ToHg15.over.chain.gz'), base_dir
+                )
+                
+                # Step 2: hg17 (Build 35) -> hg16 (Build 34)
+                print(f"  Lifting {len(lifted_35)} Build 35 positions to Build 34 (hg16)...")
+                lifted_34 = future_34.result()
+                
+                applied_34 = 0
+                for name, pos in lifted_34.items():
+                    if name in unified:
+                        unified[name].build34_position = pos
+                        applied_34 += 1
+                
+                print(f"    → {applied_34} positions lifted to Build 34")
+                
+                # Step 3: hg17 (Build 35) -> hg15 (Build 33)
+                print(f"  Lifting {len(lifted_35)} Build 35 positions to Build 33 (hg15)...")
+                lifted_33 = future_33.result()
+                
+                applied_33 = 0
+                for name, pos in lifted_33.items():
+                    if name in unified:
+                        unified[name].build33_position = pos
+                        applied_33 += 1
+                
+                print(f"    → {applied_33} positions lifted to Build 33")
         
         return applied_35, applied_34 if lifted_35 else 0, applied_33 if lifted_35 else 0
     